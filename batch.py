@@ -0,0 +1,65 @@
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import xmi_data_management
+
+def collect_files(patterns):
+    # Accepte des fichiers, des répertoires (tous les .xmi et .xmi.gz qu'ils contiennent) et des motifs glob
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(sorted(glob.glob(os.path.join(pattern, '*.xmi')) + glob.glob(os.path.join(pattern, '*.xmi.gz'))))
+        else:
+            files.extend(sorted(glob.glob(pattern)))
+    # Suppression des doublons en conservant l'ordre
+    return list(dict.fromkeys(files))
+
+def analyze_file(file_path):
+    # Exécuté dans un processus du pool : seul le résumé est renvoyé au parent
+    result = xmi_data_management.parse_xml_stream(file_path)
+    if result is None:
+        return None
+    dependencies, all_elements, elements_without_dependencies = result
+    return len(dependencies), len(all_elements), len(elements_without_dependencies)
+
+def analyze_files(files, workers=None):
+    # Générateur : renvoie (fichier, résumé) dans l'ordre de fin des analyses
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(analyze_file, file_path): file_path for file_path in files}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse de traçabilité de plusieurs fichiers XMI en parallèle")
+    parser.add_argument('paths', nargs='+', help="fichiers, répertoires ou motifs glob (ex. 'modeles/*.xmi')")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="nombre de processus (par défaut : nombre de cœurs)")
+    args = parser.parse_args()
+
+    files = collect_files(args.paths)
+    if not files:
+        print("Aucun fichier XMI trouvé")
+        return
+
+    total_dependencies = total_elements = total_uncovered = failures = 0
+    for file_path, summary in analyze_files(files, args.workers):
+        if summary is None:
+            failures += 1
+            print(f"{file_path} : échec de l'analyse")
+            continue
+        dependencies, elements, uncovered = summary
+        coverage_percentage = ((elements - uncovered) / elements) * 100 if elements > 0 else 0
+        print(f"{file_path} : {dependencies} dépendances, {elements} éléments, "
+              f"{uncovered} sans dépendance, couverture {coverage_percentage:.2f}%")
+        total_dependencies += dependencies
+        total_elements += elements
+        total_uncovered += uncovered
+
+    covered_elements = total_elements - total_uncovered
+    coverage_percentage = (covered_elements / total_elements) * 100 if total_elements > 0 else 0
+    print(f"Total : {len(files) - failures}/{len(files)} fichiers analysés, {total_dependencies} dépendances, "
+          f"{covered_elements}/{total_elements} éléments couverts ({coverage_percentage:.2f}%)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from xml.sax.saxutils import quoteattr, escape
+import graph
+import xmi_data_management
+from export import write_excel
+
+EXCEL_MAX_COLUMNS = 16384
+
+def generate_xmi(file_path, use_cases=1000, nested_use_cases=0, requirements=1000, dependencies=1000,
+                 comments=1, commented_ratio=0.5, dangling=0, packages=10, seed=0):
+    # Modèle synthétique au format des exports Modelio : cas d'utilisation (packagedElement
+    # et nestedClassifier d'une classe), instances de la classe Exigence, dépendances,
+    # commentaires ownedComment/body et références pendantes (supplier ou client inconnu).
+    # Les éléments sont répartis dans `packages` paquetages. Écriture en flux.
+    rng = random.Random(seed)
+    use_case_ids = [f"_uc{i}" for i in range(use_cases)]
+    nested_ids = [f"_nuc{i}" for i in range(nested_use_cases)]
+    requirement_ids = [f"_req{i}" for i in range(requirements)]
+    element_ids = use_case_ids + nested_ids + requirement_ids
+
+    def comment_block(elem_id, indent):
+        if rng.random() >= commented_ratio:
+            return ''
+        return ''.join(f'{indent}<ownedComment xmi:id="{elem_id}_c{k}">\n'
+                       f'{indent}  <body>{escape(f"Description {k} de {elem_id} : élément à tracer")}</body>\n'
+                       f'{indent}</ownedComment>\n' for k in range(comments))
+
+    def element_block(kind, elem_id, number):
+        if kind == 'uc':
+            inner = comment_block(elem_id, '        ')
+            head = f'      <packagedElement xmi:type="uml:UseCase" xmi:id="{elem_id}" name={quoteattr(f"Use Case {number}")}'
+            return f'{head}>\n{inner}      </packagedElement>\n' if inner else f'{head}/>\n'
+        if kind == 'nuc':
+            inner = comment_block(elem_id, '          ')
+            head = f'        <nestedClassifier xmi:type="uml:UseCase" xmi:id="{elem_id}" name={quoteattr(f"Nested Use Case {number}")}'
+            body = f'{head}>\n{inner}        </nestedClassifier>\n' if inner else f'{head}/>\n'
+            return (f'      <packagedElement xmi:type="uml:Class" xmi:id="{elem_id}_owner" name="Bloc {number}">\n'
+                    f'{body}      </packagedElement>\n')
+        inner = comment_block(elem_id, '        ')
+        head = (f'      <packagedElement xmi:type="uml:InstanceSpecification" xmi:id="{elem_id}" '
+                f'name={quoteattr(f"req{number}")} classifier="_exigence"')
+        return f'{head}>\n{inner}      </packagedElement>\n' if inner else f'{head}/>\n'
+
+    blocks = ([('uc', elem_id, i) for i, elem_id in enumerate(use_case_ids)]
+              + [('nuc', elem_id, i) for i, elem_id in enumerate(nested_ids)]
+              + [('req', elem_id, i) for i, elem_id in enumerate(requirement_ids)])
+    packages = max(1, packages)
+
+    with open(file_path, 'w', encoding='utf-8') as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                   '<xmi:XMI xmi:version="2.1" xmlns:xmi="http://schema.omg.org/spec/XMI/2.1" '
+                   'xmlns:uml="http://www.eclipse.org/uml2/3.0.0/UML">\n'
+                   '  <uml:Model xmi:id="_model" name="bench">\n'
+                   '    <packagedElement xmi:type="uml:Class" xmi:id="_exigence" name="Exigence"/>\n')
+        for package in range(packages):
+            file.write(f'    <packagedElement xmi:type="uml:Package" xmi:id="_pkg{package}" name="Paquetage {package}">\n')
+            for kind, elem_id, number in blocks[package::packages]:
+                file.write(element_block(kind, elem_id, number))
+            file.write('    </packagedElement>\n')
+
+        for i in range(dependencies):
+            supplier_id = rng.choice(element_ids) if element_ids else '_missing'
+            client_id = rng.choice(element_ids) if element_ids else '_missing'
+            if i < dangling:
+                client_id = f"_dangling{i}"
+            file.write(f'    <packagedElement xmi:type="uml:Dependency" xmi:id="_dep{i}" name="" '
+                       f'supplier="{supplier_id}" client="{client_id}"/>\n')
+        file.write('  </uml:Model>\n</xmi:XMI>\n')
+
+def generate_for_size(file_path, size, seed=0):
+    # Répartition type d'un modèle de taille `size` (cas d'utilisation + exigences)
+    use_cases = size * 2 // 10
+    nested_use_cases = size // 10
+    generate_xmi(file_path, use_cases=use_cases, nested_use_cases=nested_use_cases,
+                 requirements=size - use_cases - nested_use_cases, dependencies=size,
+                 comments=1, commented_ratio=0.5, dangling=size // 100,
+                 packages=max(1, size // 1000), seed=seed)
+
+def _measure(function, memory):
+    # Durée (sans tracemalloc, qui ralentit l'exécution) puis pic mémoire si demandé
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    peak_bytes = None
+    if memory:
+        del result
+        tracemalloc.start()
+        result = function()
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, seconds, peak_bytes
+
+def run_size(size, work_dir, memory=True, bs4_max=10000, export=True):
+    results = []
+
+    def record(stage, seconds, peak_bytes, **extra):
+        entry = {'size': size, 'stage': stage, 'seconds': round(seconds, 6), 'peak_bytes': peak_bytes, **extra}
+        results.append(entry)
+        peak = f", pic {peak_bytes / 1e6:.1f} Mo" if peak_bytes is not None else ''
+        print(f"  {stage:<10} {seconds:9.3f} s{peak}", flush=True)
+
+    file_path = os.path.join(work_dir, f"bench_{size}.xmi")
+    start = time.perf_counter()
+    generate_for_size(file_path, size)
+    print(f"{size} éléments : {os.path.getsize(file_path) / 1e6:.1f} Mo générés en {time.perf_counter() - start:.1f} s", flush=True)
+
+    content, seconds, peak_bytes = _measure(lambda: xmi_data_management.load_xml(file_path), memory)
+    record('load', seconds, peak_bytes, bytes=os.path.getsize(file_path))
+
+    if size <= bs4_max:
+        _, seconds, peak_bytes = _measure(lambda: xmi_data_management.parse_xml(content), memory)
+        record('parse_bs4', seconds, peak_bytes)
+    del content
+
+    parts, seconds, peak_bytes = _measure(lambda: xmi_data_management.scan_xmi(file_path), memory)
+    record('parse', seconds, peak_bytes, elements=len(parts[0]), edges=len(parts[2]))
+
+    trace_graph, seconds, peak_bytes = _measure(lambda: graph.build_graph(*parts), memory)
+    record('graph', seconds, peak_bytes, dependencies=trace_graph.edge_count)
+
+    coverage, seconds, peak_bytes = _measure(trace_graph.coverage, memory)
+    record('coverage', seconds, peak_bytes, coverage=round(coverage[2], 3))
+
+    # La feuille matrice est limitée à 16384 colonnes dans Excel
+    if export:
+        clients = int((trace_graph.in_degree() > 0).sum())
+        if clients < EXCEL_MAX_COLUMNS:
+            excel_path = os.path.join(work_dir, f"bench_{size}.xlsx")
+            _, seconds, peak_bytes = _measure(lambda: write_excel(trace_graph, excel_path), memory)
+            record('export', seconds, peak_bytes, bytes=os.path.getsize(excel_path))
+            os.remove(excel_path)
+        else:
+            print(f"  export     ignoré ({clients} colonnes > {EXCEL_MAX_COLUMNS - 1})")
+
+    os.remove(file_path)
+    return results
+
+def compare(results, baseline, threshold, min_seconds, memory_threshold=0.25, min_bytes=1 << 20):
+    # Régressions : durée > référence * (1 + seuil), hors écarts inférieurs à min_seconds ;
+    # pic mémoire > référence * (1 + memory_threshold), hors écarts inférieurs à min_bytes
+    # (seulement si les deux exécutions ont mesuré la mémoire)
+    reference = {(entry['size'], entry['stage']): entry for entry in baseline['results']}
+    regressions = []
+    for entry in results:
+        expected = reference.get((entry['size'], entry['stage']))
+        if expected is None:
+            continue
+        if entry['seconds'] > expected['seconds'] * (1 + threshold) and entry['seconds'] - expected['seconds'] > min_seconds:
+            regressions.append((entry['size'], entry['stage'], 'seconds', expected['seconds'], entry['seconds']))
+        peak_bytes, expected_bytes = entry.get('peak_bytes'), expected.get('peak_bytes')
+        if (peak_bytes is not None and expected_bytes is not None
+                and peak_bytes > expected_bytes * (1 + memory_threshold) and peak_bytes - expected_bytes > min_bytes):
+            regressions.append((entry['size'], entry['stage'], 'peak_bytes', expected_bytes, peak_bytes))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc de performance sur des modèles XMI synthétiques")
+    parser.add_argument('--sizes', default='1000,10000,100000,1000000',
+                        help="tailles de modèle (nombre d'éléments), séparées par des virgules")
+    parser.add_argument('--output', default='bench_results.json', help="fichier de résultats JSON")
+    parser.add_argument('--baseline', help="résultats de référence (JSON produit par une exécution précédente)")
+    parser.add_argument('--threshold', type=float, default=0.25, help="régression tolérée (0.25 = +25 %%)")
+    parser.add_argument('--min-seconds', type=float, default=0.01, help="écart absolu ignoré (bruit de mesure)")
+    parser.add_argument('--memory-threshold', type=float, default=0.25,
+                        help="hausse du pic mémoire tolérée (0.25 = +25 %%)")
+    parser.add_argument('--min-bytes', type=int, default=1 << 20, help="écart de pic mémoire ignoré, en octets")
+    parser.add_argument('--no-memory', action='store_true', help="ne pas mesurer le pic mémoire (tracemalloc)")
+    parser.add_argument('--bs4-max', type=int, default=10000, help="taille maximale pour parse_xml (BeautifulSoup)")
+    parser.add_argument('--no-export', action='store_true', help="ne pas mesurer l'export Excel")
+    parser.add_argument('--work-dir', help="répertoire des fichiers générés (temporaire par défaut)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.work_dir) as work_dir:
+        for size in sizes:
+            results.extend(run_size(size, work_dir, memory=not args.no_memory,
+                                    bs4_max=args.bs4_max, export=not args.no_export))
+
+    report = {'python': sys.version.split()[0], 'platform': platform.platform(), 'results': results}
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+    print(f"Résultats enregistrés dans {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold, args.min_seconds,
+                              args.memory_threshold, args.min_bytes)
+        for size, stage, metric, expected, measured in regressions:
+            if metric == 'seconds':
+                print(f"Régression : {stage} ({size} éléments) {expected:.3f} s -> {measured:.3f} s")
+            else:
+                print(f"Régression mémoire : {stage} ({size} éléments) pic {expected / 1e6:.1f} Mo -> {measured / 1e6:.1f} Mo")
+        if regressions:
+            sys.exit(1)
+        print("Aucune régression par rapport à la référence")
+
+if __name__ == "__main__":
+    main()
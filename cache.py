@@ -0,0 +1,142 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import instrumentation
+
+CACHE_DIR_ENV = 'XMI_CACHE_DIR'
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'xmi_data_management')
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # 1 Go
+INDEX_NAME = 'index.pickle'
+ENTRY_SUFFIX = '.pickle'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def get_cache_dir(cache_dir=None):
+    return cache_dir or os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR
+
+def _atomic_dump(obj, path):
+    # Écriture dans un fichier temporaire puis renommage : un lecteur concurrent
+    # ne voit jamais d'entrée à moitié écrite
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump(obj, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def _load_pickle(path):
+    try:
+        file = open(path, 'rb')
+    except OSError:
+        return None
+    # Une entrée tronquée ou écrite par une autre version (classe du graphe, numpy) peut
+    # lever à peu près n'importe quelle exception au chargement : elle est supprimée et
+    # traitée comme absente, le résultat sera recalculé
+    try:
+        with file:
+            return pickle.load(file)
+    except Exception:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        return None
+
+def file_digest(file_path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_key(file_path, cache_dir=None):
+    # Clé = empreinte du contenu ; l'index (taille, mtime) -> empreinte évite de
+    # relire le fichier tant qu'il n'a pas été modifié
+    cache_dir = get_cache_dir(cache_dir)
+    stat = os.stat(file_path)
+    abs_path = os.path.abspath(file_path)
+    index_path = os.path.join(cache_dir, INDEX_NAME)
+    index = _load_pickle(index_path)
+    if not isinstance(index, dict):
+        index = {}
+
+    known = index.get(abs_path)
+    if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+        return known[2]
+
+    digest = file_digest(file_path)
+    index[abs_path] = (stat.st_size, stat.st_mtime_ns, digest)
+    _atomic_dump(index, index_path)
+    return digest
+
+def _evict(cache_dir, max_bytes):
+    # Éviction LRU : la date de modification d'une entrée est rafraîchie à chaque lecture
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(ENTRY_SUFFIX) and name != INDEX_NAME:
+            path = os.path.join(cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    kept = set()
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            kept.add(path)
+            continue
+        try:
+            os.unlink(path)
+        except OSError:
+            continue
+        total -= size
+    _prune_index(cache_dir, {os.path.basename(path).split('-', 1)[0] for path in kept})
+
+def _prune_index(cache_dir, keys):
+    # Retire de l'index les fichiers dont plus aucune entrée n'existe (évincée, supprimée
+    # ou illisible) : l'index ne grossit pas indéfiniment avec les fichiers déjà vus
+    index_path = os.path.join(cache_dir, INDEX_NAME)
+    index = _load_pickle(index_path)
+    if not isinstance(index, dict):
+        return
+    pruned = {path: known for path, known in index.items() if known[2] in keys}
+    if len(pruned) != len(index):
+        _atomic_dump(pruned, index_path)
+
+def cached(file_path, compute, version, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, name=None):
+    # Renvoie compute(file_path), en le relisant depuis le cache si le même contenu
+    # a déjà été analysé par la même fonction avec la même version du parseur
+    cache_dir = get_cache_dir(cache_dir)
+    name = name or getattr(compute, '__name__', 'result')
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with instrumentation.span('cache.key'):
+            key = file_key(file_path, cache_dir)
+    except OSError:
+        return compute(file_path)
+
+    entry_path = os.path.join(cache_dir, f'{key}-{name}-v{version}{ENTRY_SUFFIX}')
+    with instrumentation.span('cache.read', name=name) as step:
+        entry = _load_pickle(entry_path)
+        hit = isinstance(entry, tuple) and len(entry) == 2 and entry[0] == version
+        step.set(hit=hit)
+    if hit:
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return entry[1]
+
+    result = compute(file_path)
+    if result is not None:
+        try:
+            with instrumentation.span('cache.write', name=name):
+                _atomic_dump((version, result), entry_path)
+                _evict(cache_dir, max_bytes)
+        except OSError as e:
+            print(f"Impossible d'écrire dans le cache : {e}")
+    return result
@@ -0,0 +1,160 @@
+import argparse
+import csv
+import json
+import os
+import instrumentation
+import sparse_matrix
+import xmi_data_management
+
+FORMATS = ('csv', 'jsonl', 'parquet', 'arrow')
+EXTENSIONS = {'csv': '.csv', 'jsonl': '.jsonl', 'parquet': '.parquet', 'arrow': '.arrow'}
+DEFAULT_CHUNK_SIZE = 50000
+
+def _import_pyarrow():
+    # Dépendance optionnelle, seulement nécessaire pour les formats colonnes
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise SystemExit("Les formats parquet et arrow nécessitent pyarrow (pip install pyarrow)")
+    return pyarrow
+
+def write_table(file_path, file_format, columns, chunks):
+    # Écrit une table par blocs : chaque bloc est un dict colonne -> liste de valeurs,
+    # seul le bloc courant est en mémoire
+    if file_format == 'csv':
+        with open(file_path, 'w', encoding='utf-8', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(columns)
+            for chunk in chunks:
+                writer.writerows(zip(*(chunk[column] for column in columns)))
+    elif file_format == 'jsonl':
+        with open(file_path, 'w', encoding='utf-8') as file:
+            for chunk in chunks:
+                file.writelines(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n'
+                                for row in zip(*(chunk[column] for column in columns)))
+    elif file_format in ('parquet', 'arrow'):
+        pa = _import_pyarrow()
+        # Schéma fixé d'avance : un bloc dont une colonne ne contient que des None
+        # (élément sans nom) serait sinon typé null et incompatible avec les suivants
+        schema = pa.schema([(column, pa.string()) for column in columns])
+        if file_format == 'parquet':
+            writer = pa.parquet.ParquetWriter(file_path, schema, compression='zstd')
+        else:
+            writer = pa.ipc.new_file(file_path, schema)
+        try:
+            for chunk in chunks:
+                writer.write_table(pa.table({column: chunk[column] for column in columns}, schema=schema))
+        finally:
+            writer.close()
+    else:
+        raise ValueError(f"Format inconnu : {file_format}")
+
+def dependency_chunks(trace_graph, chunk_size=DEFAULT_CHUNK_SIZE):
+    ids = trace_graph.ids
+    names = trace_graph.names
+    descriptions = trace_graph.descriptions
+    for start in range(0, trace_graph.edge_count, chunk_size):
+        suppliers = trace_graph.suppliers[start:start + chunk_size].tolist()
+        clients = trace_graph.clients[start:start + chunk_size].tolist()
+        yield {
+            'xmi_id': trace_graph.edge_ids[start:start + chunk_size],
+            'supplier_id': [ids[node] for node in suppliers],
+            'supplier': [names[node] for node in suppliers],
+            'client_id': [ids[node] for node in clients],
+            'client': [names[node] for node in clients],
+            'supplier_description': [descriptions[node] for node in suppliers],
+            'client_description': [descriptions[node] for node in clients],
+        }
+
+def uncovered_chunks(trace_graph, chunk_size=DEFAULT_CHUNK_SIZE):
+    uncovered = trace_graph.uncovered()
+    for start in range(0, len(uncovered), chunk_size):
+        nodes = uncovered[start:start + chunk_size].tolist()
+        yield {
+            'xmi_id': [trace_graph.ids[node] for node in nodes],
+            'name': [trace_graph.names[node] for node in nodes],
+            'description': [trace_graph.descriptions[node] for node in nodes],
+        }
+
+def matrix_chunks(trace_graph, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Matrice de couverture creuse : une ligne par couple (supplier, client) distinct
+    supplier_nodes, client_nodes = trace_graph.matrix_pairs()
+    ids = trace_graph.ids
+    names = trace_graph.names
+    for start in range(0, len(supplier_nodes), chunk_size):
+        suppliers = supplier_nodes[start:start + chunk_size].tolist()
+        clients = client_nodes[start:start + chunk_size].tolist()
+        yield {
+            'supplier_id': [ids[node] for node in suppliers],
+            'supplier': [names[node] for node in suppliers],
+            'client_id': [ids[node] for node in clients],
+            'client': [names[node] for node in clients],
+        }
+
+TABLES = {
+    'dependencies': (['xmi_id', 'supplier_id', 'supplier', 'client_id', 'client',
+                      'supplier_description', 'client_description'], dependency_chunks),
+    'uncovered': (['xmi_id', 'name', 'description'], uncovered_chunks),
+    'matrix': (['supplier_id', 'supplier', 'client_id', 'client'], matrix_chunks),
+}
+
+def export_graph(trace_graph, output_dir, file_format='csv', chunk_size=DEFAULT_CHUNK_SIZE, tables=tuple(TABLES)):
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for table in tables:
+        columns, chunks = TABLES[table]
+        file_path = os.path.join(output_dir, table + EXTENSIONS[file_format])
+        with instrumentation.span('export.' + table, format=file_format):
+            write_table(file_path, file_format, columns, chunks(trace_graph, chunk_size))
+        written.append(file_path)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Extraction de traçabilité sans interface graphique")
+    parser.add_argument('file_paths', nargs='+', help="fichier(s) XMI d'un même projet")
+    parser.add_argument('-o', '--output-dir', default='.', help="répertoire de sortie")
+    parser.add_argument('-f', '--format', choices=FORMATS, default='csv', help="format de sortie")
+    parser.add_argument('-t', '--tables', default=','.join(TABLES),
+                        help="tables à écrire parmi " + ', '.join(TABLES))
+    parser.add_argument('--npz', action='store_true',
+                        help="écrire aussi la matrice creuse coverage_matrix.npz (voir sparse_matrix.py)")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="lignes écrites par bloc")
+    parser.add_argument('--no-cache', action='store_true', help="ne pas utiliser le cache disque")
+    parser.add_argument('--trace', default=os.environ.get(instrumentation.TRACE_ENV),
+                        help="fichier des mesures par étape (durée, compteurs)")
+    parser.add_argument('--trace-format', choices=instrumentation.TRACE_FORMATS,
+                        default=os.environ.get(instrumentation.TRACE_FORMAT_ENV, 'json'),
+                        help="json ou chrome (chrome://tracing, Perfetto)")
+    parser.add_argument('--trace-memory', action='store_true', help="mesurer le pic mémoire de chaque étape (plus lent)")
+    parser.add_argument('--profile', default=os.environ.get(instrumentation.PROFILE_ENV),
+                        help="fichier .prof de cProfile")
+    args = parser.parse_args()
+    instrumentation.configure(args.trace, args.trace_format,
+                              args.trace_memory or os.environ.get(instrumentation.TRACE_MEMORY_ENV, '') not in ('', '0'),
+                              args.profile)
+
+    tables = [table.strip() for table in args.tables.split(',') if table.strip()]
+    unknown = [table for table in tables if table not in TABLES]
+    if unknown:
+        parser.error(f"tables inconnues : {', '.join(unknown)}")
+
+    load_graph = xmi_data_management.load_graph if args.no_cache else xmi_data_management.load_graph_cached
+    try:
+        trace_graph = load_graph(args.file_paths)
+    except xmi_data_management.XMILoadError as e:
+        raise SystemExit(f"Erreur lors du chargement du fichier XML : {e}")
+
+    for file_path in export_graph(trace_graph, args.output_dir, args.format, args.chunk_size, tables):
+        print(f"Écrit : {file_path}")
+    if args.npz:
+        file_path = os.path.join(args.output_dir, 'coverage_matrix' + sparse_matrix.EXTENSION)
+        with instrumentation.span('export.npz'):
+            sparse_matrix.save(sparse_matrix.from_graph(trace_graph), file_path)
+        print(f"Écrit : {file_path}")
+    covered_elements, total_elements, coverage_percentage = trace_graph.coverage()
+    print(f"Taux de couverture: {coverage_percentage:.2f}% ({covered_elements}/{total_elements})")
+
+if __name__ == "__main__":
+    main()
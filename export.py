@@ -0,0 +1,54 @@
+from openpyxl import Workbook
+from openpyxl.cell import Cell
+from openpyxl.worksheet._write_only import WriteOnlyWorksheet
+import numpy as np
+import instrumentation
+
+class SparseWorksheet(WriteOnlyWorksheet):
+    # Feuille en écriture seule dont les lignes sont des couples (colonne, valeur), colonnes
+    # croissantes : seules les cellules remplies sont parcourues, quelle que soit la largeur
+    # de la feuille (une ligne complétée par des None coûte autant que toute la largeur)
+
+    def _values_to_row(self, values, row_idx):
+        for column, value in values:
+            yield Cell(self, row=row_idx, column=column, value=value)
+
+def write_excel(trace_graph, file_path):
+    # Classeur en écriture seule : les lignes sont écrites au fil de l'eau sans garder
+    # les cellules en mémoire
+    wb = Workbook(write_only=True)
+    
+    # Première feuille : données de dépendance
+    ws1 = wb.create_sheet(title="Données de Dépendance")
+    
+    # En-têtes
+    ws1.append(["xmi:id", "Supplier", "Client", "Supplier Description", "Client Description"])
+    
+    with instrumentation.span('export.dependencies', rows=trace_graph.edge_count):
+        for dep in trace_graph.dependency_rows():
+            ws1.append(dep)
+
+    # Préparation des données pour la matrice de couverture : lignes et colonnes par élément
+    # (et non par nom, deux éléments homonymes restent distincts), triées par nom
+    names = trace_graph.names
+    suppliers, clients = trace_graph.matrix_axes()
+    # Colonne Excel de chaque client (la colonne A porte le nom du supplier)
+    client_columns = np.zeros(len(trace_graph), dtype=np.int64)
+    client_columns[clients] = np.arange(2, len(clients) + 2)
+    
+    # Deuxième feuille : matrice de couverture, générée ligne par ligne depuis l'index CSR
+    ws2 = SparseWorksheet(parent=wb, title="Matrice de Couverture")
+    wb._add_sheet(ws2)
+
+    # Ajout des en-têtes de colonne
+    ws2.append([(1, '')] + [(column, names[client]) for column, client in enumerate(clients, 2)])
+    
+    # Ajouter les lignes de la matrice : seules les cellules 'X' sont écrites, le coût suit le
+    # nombre de dépendances et non suppliers x clients
+    with instrumentation.span('export.matrix', rows=len(suppliers), columns=len(clients)):
+        for supplier in suppliers:
+            columns = np.unique(client_columns[trace_graph.successors(supplier)]).tolist()
+            ws2.append([(1, names[supplier])] + [(column, 'X') for column in columns])  # 'X' indique un impact
+    
+    with instrumentation.span('export.save'):
+        wb.save(file_path)
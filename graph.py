@@ -0,0 +1,173 @@
+import numpy as np
+
+# Type d'élément (TraceGraph.kinds)
+KIND_USE_CASE = 0
+KIND_REQUIREMENT = 1
+KIND_UNKNOWN = 2
+KIND_NAMES = ("Cas d'utilisation", "Exigence", "Inconnu")
+
+# Dépendances écartées par build_graph (TraceGraph.orphans)
+ORPHAN_KEYS = ('missing_supplier', 'missing_client', 'missing_both', 'missing_id')
+
+def sorted_unique(values):
+    # Valeurs distinctes triées ; tri stable (qui fusionne des suites déjà triées) puis
+    # comparaison des voisins, plus rapide que np.unique (table de hachage) sur des
+    # millions d'entiers ou de chaînes d'octets
+    values = np.sort(values, kind='stable')
+    if len(values):
+        values = values[np.concatenate([[True], values[1:] != values[:-1]])]
+    return values
+
+def csr_index(keys, node_count):
+    # Index CSR : les arêtes triées par nœud (tri stable, l'ordre du document est conservé)
+    # et offsets[n]:offsets[n + 1] délimite les arêtes du nœud n ; sert aussi à regrouper
+    # des valeurs par clé entière quelconque (0 <= clé < node_count)
+    order = np.argsort(keys, kind='stable')
+    offsets = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=node_count), out=offsets[1:])
+    return offsets, order
+
+class TraceGraph:
+    # Graphe de traçabilité compact : chaque élément (cas d'utilisation ou exigence) est
+    # un entier 0..n-1, son nom et sa description ne sont stockés qu'une fois et les
+    # dépendances sont des tableaux d'entiers (supplier -> client) indexés en CSR
+    # dans les deux sens. Le type et le paquetage de chaque nœud sont facultatifs
+    # (KIND_UNKNOWN et -1 par défaut) ; les paquetages sont numérotés de la même
+    # façon, package_parents[p] donnant le paquetage parent (-1 à la racine).
+
+    def __init__(self, ids, names, descriptions, edge_ids, suppliers, clients, kinds=None, packages=None,
+                 package_ids=(), package_names=(), package_parents=(), orphans=None):
+        self.ids = ids
+        self.index = {elem_id: node for node, elem_id in enumerate(ids)}
+        self.names = names
+        self.descriptions = descriptions
+        self.edge_ids = edge_ids
+        self.suppliers = np.asarray(suppliers, dtype=np.int32)
+        self.clients = np.asarray(clients, dtype=np.int32)
+
+        self.out_offsets, self.out_edges = csr_index(self.suppliers, len(ids))
+        self.in_offsets, self.in_edges = csr_index(self.clients, len(ids))
+
+        self.kinds = (np.asarray(kinds, dtype=np.int8) if kinds is not None
+                      else np.full(len(ids), KIND_UNKNOWN, dtype=np.int8))
+        self.packages = (np.asarray(packages, dtype=np.int32) if packages is not None
+                         else np.full(len(ids), -1, dtype=np.int32))
+        self.package_ids = list(package_ids)
+        self.package_names = list(package_names)
+        self.package_parents = np.asarray(package_parents, dtype=np.int32)
+        self.orphans = dict.fromkeys(ORPHAN_KEYS, 0) if orphans is None else orphans
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def edge_count(self):
+        return len(self.edge_ids)
+
+    def out_degree(self):
+        return np.diff(self.out_offsets)
+
+    def in_degree(self):
+        return np.diff(self.in_offsets)
+
+    def degree(self):
+        return self.out_degree() + self.in_degree()
+
+    def uncovered(self):
+        # Nœuds sans aucune dépendance
+        return np.flatnonzero(self.degree() == 0)
+
+    def coverage(self):
+        total_elements = len(self.ids)
+        covered_elements = total_elements - len(self.uncovered())
+        coverage_percentage = (covered_elements / total_elements) * 100 if total_elements > 0 else 0
+        return covered_elements, total_elements, coverage_percentage
+
+    def successor_edges(self, node):
+        return self.out_edges[self.out_offsets[node]:self.out_offsets[node + 1]]
+
+    def predecessor_edges(self, node):
+        return self.in_edges[self.in_offsets[node]:self.in_offsets[node + 1]]
+
+    def successors(self, node):
+        return self.clients[self.successor_edges(node)]
+
+    def predecessors(self, node):
+        return self.suppliers[self.predecessor_edges(node)]
+
+    def adjacency(self, upstream=False):
+        # Listes d'adjacence de tous les nœuds en CSR : (offsets, voisins), les voisins de n
+        # étant voisins[offsets[n]:offsets[n + 1]] ; clients par défaut, suppliers si upstream
+        if upstream:
+            return self.in_offsets, self.suppliers[self.in_edges].astype(np.int64)
+        return self.out_offsets, self.clients[self.out_edges].astype(np.int64)
+
+    def matrix_axes(self, by_name=True):
+        # Lignes (suppliers) et colonnes (clients) de la matrice de couverture : éléments
+        # ayant au moins une dépendance sortante / entrante, triés par nom puis xmi:id
+        # (deux homonymes restent distincts), ou par xmi:id seul si by_name est faux
+        ids = self.ids
+        names = self.names
+        sort_key = (lambda node: (names[node] or '', ids[node])) if by_name else ids.__getitem__
+        return (sorted(np.flatnonzero(self.out_degree()).tolist(), key=sort_key),
+                sorted(np.flatnonzero(self.in_degree()).tolist(), key=sort_key))
+
+    def matrix_pairs(self):
+        # Couples (supplier, client) distincts, triés par supplier puis client (chaque couple
+        # est codé en un entier)
+        node_count = max(len(self.ids), 1)
+        keys = sorted_unique(self.suppliers.astype(np.int64) * node_count + self.clients)
+        return keys // node_count, keys % node_count
+
+    def dependency_rows(self):
+        # Lignes (xmi:id, supplier, client, description supplier, description client),
+        # générées à la demande dans l'ordre du document
+        names = self.names
+        descriptions = self.descriptions
+        for edge_id, supplier, client in zip(self.edge_ids, self.suppliers.tolist(), self.clients.tolist()):
+            yield edge_id, names[supplier], names[client], descriptions[supplier], descriptions[client]
+
+    def elements(self):
+        return dict(zip(self.ids, self.names))
+
+def build_graph(all_elements, descriptions, edges, kinds=None, owners=None, packages=None):
+    # Mêmes règles que resolve_dependencies : une dépendance n'est conservée que si
+    # ses deux extrémités sont des éléments connus et qu'elle a un xmi:id ; les
+    # dépendances écartées sont comptées par motif.
+    # kinds : xmi:id -> KIND_*, owners : xmi:id -> paquetage,
+    # packages : xmi:id du paquetage -> (nom, paquetage parent)
+    ids = list(all_elements)
+    index = {elem_id: node for node, elem_id in enumerate(ids)}
+    edge_ids = []
+    suppliers = []
+    clients = []
+    orphans = dict.fromkeys(ORPHAN_KEYS, 0)
+    for xmi_id, supplier_id, client_id in edges:
+        supplier = index.get(supplier_id)
+        client = index.get(client_id)
+        if supplier is None or client is None or not xmi_id:
+            if supplier is None and client is None:
+                orphans['missing_both'] += 1
+            elif supplier is None:
+                orphans['missing_supplier'] += 1
+            elif client is None:
+                orphans['missing_client'] += 1
+            else:
+                orphans['missing_id'] += 1
+            continue
+        edge_ids.append(xmi_id)
+        suppliers.append(supplier)
+        clients.append(client)
+
+    package_ids = list(packages or ())
+    package_index = {package_id: position for position, package_id in enumerate(package_ids)}
+    package_names = [packages[package_id][0] for package_id in package_ids]
+    package_parents = [package_index.get(packages[package_id][1], -1) for package_id in package_ids]
+    node_kinds = [kinds.get(elem_id, KIND_UNKNOWN) for elem_id in ids] if kinds is not None else None
+    node_packages = [package_index.get(owners.get(elem_id), -1) for elem_id in ids] if owners is not None else None
+
+    return TraceGraph(ids,
+                      [all_elements[elem_id] for elem_id in ids],
+                      [descriptions.get(elem_id, '') for elem_id in ids],
+                      edge_ids, suppliers, clients, node_kinds, node_packages,
+                      package_ids, package_names, package_parents, orphans)
@@ -0,0 +1,206 @@
+import argparse
+from collections import OrderedDict
+import numpy as np
+import graph
+import xmi_data_management
+
+CLOSURE_CACHE_ITEMS = 1 << 22  # Nœuds mémorisés au total dans les fermetures (4M x 8 octets), au-delà : LRU
+
+def _strongly_connected_components(offsets, targets, node_count):
+    # Tarjan itératif : les composantes sont numérotées dans l'ordre topologique inverse
+    # (toute composante atteignable depuis c a un numéro inférieur à c)
+    offsets = offsets.tolist()
+    targets = targets.tolist()
+    index = [-1] * node_count
+    low = [0] * node_count
+    on_stack = [False] * node_count
+    component = [-1] * node_count
+    stack = []
+    counter = 0
+    component_count = 0
+
+    for root in range(node_count):
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, offsets[root])]
+        while work:
+            node, position = work[-1]
+            if position < offsets[node + 1]:
+                work[-1] = (node, position + 1)
+                target = targets[position]
+                if index[target] == -1:
+                    index[target] = low[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack[target] = True
+                    work.append((target, offsets[target]))
+                elif on_stack[target] and index[target] < low[node]:
+                    low[node] = index[target]
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+            if low[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component[member] = component_count
+                    if member == node:
+                        break
+                component_count += 1
+
+    return np.asarray(component, dtype=np.int64), component_count
+
+def _group(keys, values, group_count):
+    # Regroupement CSR : values[offsets[k]:offsets[k + 1]] pour la clé k
+    offsets, order = graph.csr_index(keys, group_count)
+    return offsets, values[order]
+
+def _gather(offsets, values, groups):
+    # Concaténation des groupes values[offsets[g]:offsets[g + 1]] sans boucle Python
+    starts = offsets[groups]
+    lengths = offsets[groups + 1] - starts
+    ends = np.cumsum(lengths)
+    return values[np.repeat(starts - ends + lengths, lengths) + np.arange(ends[-1] if len(ends) else 0)]
+
+class ImpactAnalyzer:
+    # Analyse d'impact transitive sur un graph.TraceGraph. Par défaut on suit le sens
+    # supplier -> client (ce qui dépend de l'élément modifié) ; upstream=True suit le sens
+    # inverse. Le graphe est condensé en composantes fortement connexes ; une requête est
+    # un parcours du graphe condensé, dont le résultat est mémorisé dans un cache LRU borné
+    # par le nombre total de nœuds conservés.
+
+    def __init__(self, trace_graph, upstream=False):
+        self.graph = trace_graph
+        node_count = len(trace_graph)
+        self.offsets, self.targets = trace_graph.adjacency(upstream)
+
+        self.component, self.component_count = _strongly_connected_components(self.offsets, self.targets, node_count)
+
+        # Membres de chaque composante
+        self.member_offsets, self.members = _group(self.component, np.arange(node_count, dtype=np.int64),
+                                                    self.component_count)
+
+        # Graphe condensé (DAG) entre composantes, sans doublons
+        sources = np.repeat(np.arange(node_count, dtype=np.int64), np.diff(self.offsets))
+        source_components = self.component[sources]
+        target_components = self.component[self.targets]
+        inner = source_components == target_components
+        self.cyclic = np.diff(self.member_offsets) > 1
+        self.cyclic[source_components[inner]] = True  # Boucles sur un seul élément
+        pairs = np.unique(np.stack([source_components[~inner], target_components[~inner]]), axis=1)
+        self.dag_offsets, self.dag_targets = _group(pairs[0], pairs[1], self.component_count)
+        self.dag_offsets = self.dag_offsets.tolist()
+        self.dag_targets = self.dag_targets.tolist()
+
+        self._closures = OrderedDict()  # composante -> nœuds atteignables (triés)
+        self._cached_items = 0
+
+    def _reachable_components(self, component):
+        # Parcours en profondeur du graphe condensé, marques dans un tableau d'octets :
+        # coût proportionnel à la partie atteinte, mémoire temporaire en O(composantes)
+        offsets = self.dag_offsets
+        targets = self.dag_targets
+        visited = bytearray(self.component_count)
+        visited[component] = 1
+        stack = [component]
+        while stack:
+            current = stack.pop()
+            for successor in targets[offsets[current]:offsets[current + 1]]:
+                if not visited[successor]:
+                    visited[successor] = 1
+                    stack.append(successor)
+        if not self.cyclic[component]:
+            visited[component] = 0
+        return np.flatnonzero(np.frombuffer(visited, dtype=np.uint8))
+
+    def _closure(self, component):
+        closures = self._closures
+        nodes = closures.get(component)
+        if nodes is not None:
+            closures.move_to_end(component)
+            return nodes
+        nodes = np.sort(_gather(self.member_offsets, self.members, self._reachable_components(component)))
+        closures[component] = nodes
+        self._cached_items += len(nodes) + 1
+        while self._cached_items > CLOSURE_CACHE_ITEMS and len(closures) > 1:
+            self._cached_items -= len(closures.popitem(last=False)[1]) + 1
+        return nodes
+
+    def reachable(self, node, max_depth=None):
+        # Nœuds atteignables depuis node par au moins une dépendance
+        if max_depth is not None:
+            return np.asarray(sorted(self.within(node, max_depth)), dtype=np.int64)
+        return self._closure(int(self.component[node])).copy()
+
+    def within(self, node, max_depth):
+        # Parcours en largeur borné : {nœud: distance minimale} pour 1 <= distance <= max_depth
+        offsets = self.offsets
+        targets = self.targets
+        depths = {}
+        frontier = [node]
+        for depth in range(1, max_depth + 1):
+            next_frontier = []
+            for current in frontier:
+                for target in targets[offsets[current]:offsets[current + 1]].tolist():
+                    if target not in depths:
+                        depths[target] = depth
+                        next_frontier.append(target)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return depths
+
+    def transitive_closure(self):
+        # Relation complète sous forme de paires (source, cible) ; à réserver aux petits modèles
+        pairs = []
+        for node in range(len(self.graph)):
+            for target in self.reachable(node).tolist():
+                pairs.append((node, target))
+        return pairs
+
+    def cycles(self):
+        # Composantes fortement connexes non triviales (cycles de dépendances)
+        return [self.members[self.member_offsets[component]:self.member_offsets[component + 1]]
+                for component in np.flatnonzero(self.cyclic).tolist()]
+
+    def has_cycle(self):
+        return bool(self.cyclic.any())
+
+    def impacted_ids(self, xmi_id, max_depth=None):
+        nodes = self.reachable(self.graph.index[xmi_id], max_depth)
+        return [self.graph.ids[node] for node in nodes.tolist()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse d'impact transitive d'un élément du modèle")
+    parser.add_argument('file_path', help="fichier XMI")
+    parser.add_argument('xmi_id', nargs='?', help="xmi:id de l'élément modifié (sans id : liste des cycles)")
+    parser.add_argument('-d', '--depth', type=int, default=None, help="profondeur maximale")
+    parser.add_argument('--upstream', action='store_true', help="remonter vers les éléments dont il dépend")
+    args = parser.parse_args()
+
+    try:
+        trace_graph = xmi_data_management.load_graph_cached(args.file_path)
+    except xmi_data_management.XMILoadError as e:
+        raise SystemExit(f"Erreur lors du chargement du fichier XML : {e}")
+    analyzer = ImpactAnalyzer(trace_graph, upstream=args.upstream)
+
+    if args.xmi_id is None:
+        for members in analyzer.cycles():
+            print("Cycle : " + ", ".join(trace_graph.names[node] or trace_graph.ids[node] for node in members.tolist()))
+        return
+    if args.xmi_id not in trace_graph.index:
+        print(f"Élément inconnu : {args.xmi_id}")
+        return
+    for elem_id in analyzer.impacted_ids(args.xmi_id, args.depth):
+        print(f"{elem_id}: {trace_graph.names[trace_graph.index[elem_id]]}")
+
+if __name__ == "__main__":
+    main()
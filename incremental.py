@@ -0,0 +1,171 @@
+import sys
+import xmi_data_management
+
+# Types de changements du rapport
+ELEMENT_ADDED = 'element_added'
+ELEMENT_REMOVED = 'element_removed'
+ELEMENT_MODIFIED = 'element_modified'
+DEPENDENCY_ADDED = 'dependency_added'
+DEPENDENCY_REMOVED = 'dependency_removed'
+DEPENDENCY_MODIFIED = 'dependency_modified'
+COVERAGE_LOST = 'coverage_lost'
+COVERAGE_GAINED = 'coverage_gained'
+
+def _is_valid(edge, elements):
+    supplier_id, client_id = edge
+    return supplier_id in elements and client_id in elements
+
+def build_snapshot(all_elements, descriptions, edges):
+    # État complet d'une révision : éléments, dépendances par xmi:id, index inverse
+    # élément -> dépendances (y compris les références pendantes) et degrés
+    dependencies = {xmi_id: (supplier_id, client_id) for xmi_id, supplier_id, client_id in edges if xmi_id}
+    incident = {}
+    degree = {elem_id: 0 for elem_id in all_elements}
+    for xmi_id, edge in dependencies.items():
+        for elem_id in edge:
+            incident.setdefault(elem_id, set()).add(xmi_id)
+        if _is_valid(edge, all_elements):
+            for elem_id in edge:
+                degree[elem_id] += 1
+
+    return {
+        'elements': all_elements,
+        'descriptions': descriptions,
+        'dependencies': dependencies,
+        'incident': incident,
+        'degree': degree,
+        'uncovered': {elem_id for elem_id, count in degree.items() if count == 0},
+    }
+
+def snapshot_file(file_path):
+    return build_snapshot(*xmi_data_management.scan_xmi(file_path))
+
+def snapshot_result(snapshot):
+    # Reconstruit le triplet de parse_xml pour l'IHM ou l'export
+    edges = [(xmi_id, supplier_id, client_id)
+             for xmi_id, (supplier_id, client_id) in snapshot['dependencies'].items()]
+    return xmi_data_management.resolve_dependencies(snapshot['elements'], snapshot['descriptions'], edges)
+
+def coverage(snapshot):
+    total_elements = len(snapshot['elements'])
+    covered_elements = total_elements - len(snapshot['uncovered'])
+    coverage_percentage = (covered_elements / total_elements) * 100 if total_elements > 0 else 0
+    return covered_elements, total_elements, coverage_percentage
+
+def _label(elem_id, *element_maps):
+    for elements in element_maps:
+        if elem_id in elements:
+            return f"{elements[elem_id]} ({elem_id})"
+    return f"{elem_id} (inconnu)"
+
+def _sorted_ids(ids):
+    # Ordre stable du rapport d'une exécution à l'autre (les ensembles de chaînes n'en ont pas)
+    return sorted(ids, key=lambda elem_id: (elem_id is None, elem_id or ''))
+
+def apply_changes(previous, all_elements, descriptions, edges):
+    # Met à jour previous en place avec la nouvelle révision : seuls les éléments et
+    # dépendances modifiés (et leurs voisins) sont retraités. Renvoie le rapport.
+    old_elements = previous['elements']
+    old_descriptions = previous['descriptions']
+    old_dependencies = previous['dependencies']
+    incident = previous['incident']
+    degree = previous['degree']
+    uncovered = previous['uncovered']
+    new_dependencies = {xmi_id: (supplier_id, client_id) for xmi_id, supplier_id, client_id in edges if xmi_id}
+    changes = []
+
+    # Différences sur les éléments
+    added_elements = all_elements.keys() - old_elements.keys()
+    removed_elements = old_elements.keys() - all_elements.keys()
+    for elem_id in _sorted_ids(all_elements.keys() & old_elements.keys()):
+        if (all_elements[elem_id] != old_elements[elem_id]
+                or descriptions.get(elem_id, '') != old_descriptions.get(elem_id, '')):
+            changes.append((ELEMENT_MODIFIED, elem_id,
+                            f"élément {_label(elem_id, old_elements)} modifié en {all_elements[elem_id]}"))
+    for elem_id in _sorted_ids(added_elements):
+        changes.append((ELEMENT_ADDED, elem_id, f"élément {_label(elem_id, all_elements)} ajouté"))
+    for elem_id in _sorted_ids(removed_elements):
+        changes.append((ELEMENT_REMOVED, elem_id, f"élément {_label(elem_id, old_elements)} supprimé"))
+
+    # Différences sur les dépendances
+    changed_dependencies = set()
+    for xmi_id in _sorted_ids(new_dependencies.keys() - old_dependencies.keys()):
+        changed_dependencies.add(xmi_id)
+        supplier_id, client_id = new_dependencies[xmi_id]
+        changes.append((DEPENDENCY_ADDED, xmi_id,
+                        f"dépendance {xmi_id} ajoutée : {_label(supplier_id, all_elements)} -> {_label(client_id, all_elements)}"))
+    for xmi_id in _sorted_ids(old_dependencies.keys() - new_dependencies.keys()):
+        changed_dependencies.add(xmi_id)
+        supplier_id, client_id = old_dependencies[xmi_id]
+        changes.append((DEPENDENCY_REMOVED, xmi_id,
+                        f"dépendance {xmi_id} supprimée : {_label(supplier_id, old_elements)} -> {_label(client_id, old_elements)}"))
+    for xmi_id in _sorted_ids(new_dependencies.keys() & old_dependencies.keys()):
+        if new_dependencies[xmi_id] != old_dependencies[xmi_id]:
+            changed_dependencies.add(xmi_id)
+            supplier_id, client_id = new_dependencies[xmi_id]
+            changes.append((DEPENDENCY_MODIFIED, xmi_id,
+                            f"dépendance {xmi_id} modifiée : {_label(supplier_id, all_elements)} -> {_label(client_id, all_elements)}"))
+
+    # Dépendances dont la validité peut changer : modifiées, ou reliées à un élément ajouté/supprimé
+    affected = set(changed_dependencies)
+    for elem_id in added_elements | removed_elements:
+        affected |= incident.get(elem_id, set())
+
+    # Application du delta sur les degrés et l'index inverse
+    touched = set(added_elements | removed_elements)
+    for xmi_id in affected:
+        old_edge = old_dependencies.get(xmi_id)
+        new_edge = new_dependencies.get(xmi_id)
+        if old_edge is not None and _is_valid(old_edge, old_elements):
+            for elem_id in old_edge:
+                degree[elem_id] -= 1
+                touched.add(elem_id)
+        if new_edge is not None and _is_valid(new_edge, all_elements):
+            for elem_id in new_edge:
+                degree[elem_id] = degree.get(elem_id, 0) + 1
+                touched.add(elem_id)
+        if xmi_id in changed_dependencies:
+            for elem_id in old_edge or ():
+                incident.get(elem_id, set()).discard(xmi_id)
+            for elem_id in new_edge or ():
+                incident.setdefault(elem_id, set()).add(xmi_id)
+
+    # Mise à jour de l'ensemble des éléments non couverts
+    for elem_id in _sorted_ids(touched):
+        if elem_id not in all_elements:
+            degree.pop(elem_id, None)
+            uncovered.discard(elem_id)
+            continue
+        was_uncovered = elem_id in uncovered
+        if degree.setdefault(elem_id, 0) == 0:
+            uncovered.add(elem_id)
+            if not was_uncovered and elem_id not in added_elements:
+                changes.append((COVERAGE_LOST, elem_id,
+                                f"élément {_label(elem_id, all_elements)} a perdu sa dernière dépendance"))
+        else:
+            uncovered.discard(elem_id)
+            if was_uncovered and elem_id not in added_elements:
+                changes.append((COVERAGE_GAINED, elem_id,
+                                f"élément {_label(elem_id, all_elements)} est désormais couvert"))
+
+    previous['elements'] = all_elements
+    previous['descriptions'] = descriptions
+    previous['dependencies'] = new_dependencies
+    return changes
+
+def update_from_file(previous, file_path):
+    return apply_changes(previous, *xmi_data_management.scan_xmi(file_path))
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage : python incremental.py ancien.xmi nouveau.xmi")
+        return
+    snapshot = snapshot_file(sys.argv[1])
+    changes = update_from_file(snapshot, sys.argv[2])
+    for change_type, xmi_id, message in changes:
+        print(f"[{change_type}] {message}")
+    covered_elements, total_elements, coverage_percentage = coverage(snapshot)
+    print(f"Taux de couverture: {coverage_percentage:.2f}% ({covered_elements}/{total_elements})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import atexit
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+TRACE_ENV = 'XMI_TRACE'  # Fichier des mesures, active l'instrumentation
+TRACE_FORMAT_ENV = 'XMI_TRACE_FORMAT'  # 'json' (par défaut) ou 'chrome'
+TRACE_MEMORY_ENV = 'XMI_TRACE_MEMORY'  # '1' : pic mémoire par étape (tracemalloc)
+PROFILE_ENV = 'XMI_PROFILE'  # Fichier .prof (cProfile) du thread principal
+TRACE_FORMATS = ('json', 'chrome')
+
+# Désactivée par défaut : span() renvoie alors un objet inerte partagé, le coût
+# se limite à un appel de fonction et un test par étape instrumentée
+_enabled = False
+_memory = False
+_started_tracemalloc = False
+_profiler = None
+_records = []
+_lock = threading.Lock()
+_local = threading.local()
+_origin_ns = time.perf_counter_ns()
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **counts):
+        pass
+
+NULL_SPAN = _NullSpan()
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+class Span:
+    # Étape mesurée : durée, compteurs (éléments, dépendances...) et, si la mémoire est
+    # suivie, pic alloué pendant l'étape au-delà de la mémoire déjà allouée à l'entrée.
+    # tracemalloc est global : le pic inclut les allocations des autres threads.
+
+    def __init__(self, name, counts):
+        self.name = name
+        self.counts = counts
+        self.start_ns = 0
+        self.base_bytes = 0
+        self.peak_bytes = 0
+
+    def set(self, **counts):
+        self.counts.update(counts)
+
+    def __enter__(self):
+        stack = _stack()
+        if _memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # Le pic atteint jusqu'ici dans l'étape parente est conservé avant remise à zéro
+                stack[-1].peak_bytes = max(stack[-1].peak_bytes, peak)
+            tracemalloc.reset_peak()
+            self.base_bytes = self.peak_bytes = current
+        stack.append(self)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end_ns = time.perf_counter_ns()
+        stack = _stack()
+        stack.pop()
+        record = {
+            'name': self.name,
+            'start_ms': (self.start_ns - _origin_ns) / 1e6,
+            'duration_ms': (end_ns - self.start_ns) / 1e6,
+            'thread': threading.current_thread().name,
+            'depth': len(stack),
+            'counts': self.counts,
+        }
+        if _memory and tracemalloc.is_tracing():
+            self.peak_bytes = max(self.peak_bytes, tracemalloc.get_traced_memory()[1])
+            if stack:
+                stack[-1].peak_bytes = max(stack[-1].peak_bytes, self.peak_bytes)
+            record['peak_bytes'] = self.peak_bytes - self.base_bytes
+        if exc_info[0] is not None:
+            record['error'] = exc_info[0].__name__
+        with _lock:
+            _records.append(record)
+        return False
+
+def span(name, /, **counts):
+    # with instrumentation.span('parse', fichier=...) as step: ... step.set(elements=n)
+    if not _enabled:
+        return NULL_SPAN
+    return Span(name, counts)
+
+def is_enabled():
+    return _enabled
+
+def enable(memory=False, profile=False):
+    global _enabled, _memory, _started_tracemalloc, _profiler
+    _enabled = True
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+    if profile and _profiler is None:
+        # cProfile ne suit que le thread appelant
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+def disable():
+    global _enabled, _memory, _started_tracemalloc, _profiler
+    _enabled = False
+    _memory = False
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+    if _profiler is not None:
+        _profiler.disable()
+
+def reset():
+    with _lock:
+        _records.clear()
+
+def records():
+    with _lock:
+        return list(_records)
+
+def summary():
+    # Agrégat par étape : nombre d'appels, durée totale et maximale, pic mémoire maximal
+    stages = {}
+    for record in records():
+        stage = stages.setdefault(record['name'], {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'peak_bytes': None})
+        stage['calls'] += 1
+        stage['total_ms'] += record['duration_ms']
+        stage['max_ms'] = max(stage['max_ms'], record['duration_ms'])
+        if 'peak_bytes' in record:
+            stage['peak_bytes'] = max(stage['peak_bytes'] or 0, record['peak_bytes'])
+    return stages
+
+def write_json(file_path):
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump({'spans': records(), 'summary': summary()}, file, indent=2, ensure_ascii=False)
+
+def write_chrome_trace(file_path):
+    # Format « trace event » (chrome://tracing, Perfetto) : un événement complet par étape
+    thread_ids = {}
+    events = []
+    for record in records():
+        tid = thread_ids.setdefault(record['thread'], len(thread_ids) + 1)
+        args = dict(record['counts'])
+        if 'peak_bytes' in record:
+            args['peak_bytes'] = record['peak_bytes']
+        events.append({'name': record['name'], 'ph': 'X', 'pid': os.getpid(), 'tid': tid,
+                       'ts': record['start_ms'] * 1000, 'dur': record['duration_ms'] * 1000, 'args': args})
+    events.extend({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': thread}}
+                  for thread, tid in thread_ids.items())
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file, ensure_ascii=False)
+
+def write_profile(file_path):
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(file_path)
+
+def print_summary(file=sys.stderr):
+    for name, stage in sorted(summary().items(), key=lambda item: -item[1]['total_ms']):
+        peak = f", pic {stage['peak_bytes'] / 1e6:.1f} Mo" if stage['peak_bytes'] is not None else ''
+        print(f"  {name:<28} {stage['calls']:>5} x {stage['total_ms']:10.1f} ms{peak}", file=file)
+
+def configure(trace_path=None, trace_format='json', memory=False, profile_path=None):
+    # Active l'instrumentation et écrit les résultats à la fin du programme
+    if trace_format not in TRACE_FORMATS:
+        raise ValueError(f"Format de trace inconnu : {trace_format}")
+    if not trace_path and not profile_path:
+        return
+    enable(memory=memory, profile=bool(profile_path))
+
+    def write_outputs():
+        if trace_path:
+            if trace_format == 'chrome':
+                write_chrome_trace(trace_path)
+            else:
+                write_json(trace_path)
+            print(f"Mesures enregistrées dans {trace_path}", file=sys.stderr)
+            print_summary()
+        if profile_path:
+            write_profile(profile_path)
+            print(f"Profil enregistré dans {profile_path} (python -m pstats {profile_path})", file=sys.stderr)
+
+    atexit.register(write_outputs)
+
+def configure_from_environment():
+    configure(os.environ.get(TRACE_ENV), os.environ.get(TRACE_FORMAT_ENV, 'json'),
+              os.environ.get(TRACE_MEMORY_ENV, '') not in ('', '0'), os.environ.get(PROFILE_ENV))
@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import quote, urlsplit
+
+async def _request(reader, writer, host, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode('latin-1'))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        if key.strip().lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+async def fetch_json(host, port, path):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        status, body = await _request(reader, writer, host, path)
+    finally:
+        writer.close()
+    if status != 200:
+        raise SystemExit(f"{path} : HTTP {status} {body.decode('utf-8')}")
+    return json.loads(body)
+
+async def default_paths(host, port, model):
+    # Mélange de requêtes représentatif : couverture, non couverts, voisins, recherches, fenêtres de matrice
+    if model is None:
+        models = await fetch_json(host, port, '/models')
+        if not models:
+            raise SystemExit("Aucun modèle chargé sur le serveur")
+        model = models[0]['name']
+    base = f"/models/{quote(model)}"
+    matrix = await fetch_json(host, port, f"{base}/matrix?row_limit=1000&column_limit=1")
+    elements = matrix['rows'] or (await fetch_json(host, port, f"{base}/uncovered?limit=1000"))['elements']
+    paths = [f"{base}/coverage", f"{base}/uncovered?limit=20"]
+    paths += [f"{base}/elements/{quote(element['id'])}" for element in elements[:200]]
+    paths += [f"{base}/search?q={quote((element['name'] or '')[:4])}&limit=20" for element in elements[:50]
+              if element['name']]
+    paths += [f"{base}/fulltext?q={quote((element['name'] or '')[:5])}&limit=20" for element in elements[:50]
+              if element['name']]
+    paths += [f"{base}/matrix?row_offset={offset}&row_limit=50&column_offset={offset}&column_limit=50"
+              for offset in range(0, max(matrix['row_count'], 1), max(matrix['row_count'] // 20, 1))]
+    return paths
+
+async def _worker(host, port, paths, deadline, remaining, latencies, errors, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline and remaining[0] > 0:
+            remaining[0] -= 1
+            path = rng.choice(paths)
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, host, path)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append((status, path))
+    finally:
+        writer.close()
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+async def run(url, model, concurrency, duration, requests):
+    parsed = urlsplit(url)
+    host, port = parsed.hostname or '127.0.0.1', parsed.port or 80
+    paths = await default_paths(host, port, model)
+    latencies = []
+    errors = []
+    remaining = [requests if requests else float('inf')]
+    start = time.perf_counter()
+    await asyncio.gather(*(_worker(host, port, paths, start + duration, remaining, latencies, errors, seed)
+                           for seed in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'seconds': elapsed,
+        'requests_per_second': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p90_ms': percentile(latencies, 0.90) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Test de charge du serveur de requêtes (server.py)")
+    parser.add_argument('url', nargs='?', default='http://127.0.0.1:8765', help="adresse du serveur")
+    parser.add_argument('-m', '--model', help="modèle interrogé (par défaut : le premier chargé)")
+    parser.add_argument('-c', '--concurrency', type=int, default=32, help="connexions simultanées")
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help="durée maximale en secondes")
+    parser.add_argument('-n', '--requests', type=int, default=0, help="nombre de requêtes (0 : limité par la durée)")
+    parser.add_argument('--output', help="fichier JSON des résultats")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.url, args.model, args.concurrency, args.duration, args.requests))
+    print(f"{report['requests']} requêtes en {report['seconds']:.2f} s ({report['errors']} erreurs)")
+    print(f"Débit : {report['requests_per_second']:.0f} req/s")
+    print(f"Latence : p50 {report['p50_ms']:.2f} ms, p90 {report['p90_ms']:.2f} ms, "
+          f"p99 {report['p99_ms']:.2f} ms, max {report['max_ms']:.2f} ms")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
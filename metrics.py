@@ -0,0 +1,161 @@
+import argparse
+import json
+import numpy as np
+import graph
+import xmi_data_management
+
+# Sens de traçabilité d'un élément : remonte vers un supplier (amont), descend vers un client (aval)
+DIRECTION_KEYS = ('none', 'upstream_only', 'downstream_only', 'both')
+DIRECTION_NAMES = ("Non tracé", "Amont seulement", "Aval seulement", "Amont et aval")
+# Colonnes des compteurs par paquetage
+PACKAGE_COLUMNS = ('total', 'covered', 'upstream', 'downstream')
+
+def _percentage(covered, total):
+    return covered / total * 100 if total > 0 else 0
+
+def _package_depths(parents):
+    # Profondeur de chaque paquetage (0 à la racine), par propagation niveau par niveau ;
+    # un cycle (fichiers incohérents) est coupé au bout de len(parents) niveaux
+    depths = np.zeros(len(parents), dtype=np.int64)
+    has_parent = parents >= 0
+    for _ in range(len(parents)):
+        updated = np.where(has_parent, depths[np.maximum(parents, 0)] + 1, 0)
+        if np.array_equal(updated, depths):
+            break
+        depths = np.minimum(updated, len(parents))
+    return depths
+
+def _rollup(direct, parents, depths):
+    # Cumul des compteurs des sous-paquetages : chaque niveau, du plus profond au plus haut,
+    # est ajouté à ses parents en une seule opération
+    cumulative = direct.copy()
+    for depth in range(int(depths.max(initial=0)), 0, -1):
+        level = np.flatnonzero((depths == depth) & (parents >= 0))
+        np.add.at(cumulative, parents[level], cumulative[level])
+    return cumulative
+
+def package_paths(trace_graph):
+    # Chemin complet de chaque paquetage : 'Modèle/Paquetage/Sous-paquetage'
+    names = [name or '' for name in trace_graph.package_names]
+    parents = trace_graph.package_parents.tolist()
+    paths = [None] * len(names)
+    for package in range(len(names)):
+        chain = []
+        current = package
+        while current >= 0 and paths[current] is None and len(chain) <= len(names):
+            chain.append(current)
+            current = parents[current]
+        prefix = paths[current] if current >= 0 and paths[current] is not None else None
+        for member in reversed(chain):
+            prefix = names[member] if prefix is None else f"{prefix}/{names[member]}"
+            paths[member] = prefix
+    return paths
+
+def compute_metrics(trace_graph):
+    # Couverture par type d'élément, par sens de traçabilité et par paquetage (direct et
+    # cumulé sur la hiérarchie), dépendances par couple de types et dépendances orphelines.
+    # Tout est calculé par comptages NumPy (bincount) sur les tableaux du graphe.
+    node_count = len(trace_graph)
+    kind_count = len(graph.KIND_NAMES)
+    upstream = trace_graph.in_degree() > 0
+    downstream = trace_graph.out_degree() > 0
+    covered = upstream | downstream
+    direction = upstream.astype(np.int64) + 2 * downstream
+    kinds = trace_graph.kinds.astype(np.int64)
+
+    # Type x sens : une seule passe, les autres comptes en sont des sommes
+    kind_direction = np.bincount(kinds * 4 + direction, minlength=kind_count * 4).reshape(kind_count, 4)
+    kind_totals = kind_direction.sum(axis=1)
+    direction_totals = kind_direction.sum(axis=0)
+    covered_count = node_count - int(direction_totals[0])
+
+    by_kind = []
+    for kind, name in enumerate(graph.KIND_NAMES):
+        total = int(kind_totals[kind])
+        if total == 0 and kind == graph.KIND_UNKNOWN:
+            continue
+        kind_covered = total - int(kind_direction[kind, 0])
+        entry = {'kind': name, 'total': total, 'covered': kind_covered,
+                 'percentage': _percentage(kind_covered, total)}
+        entry.update(zip(DIRECTION_KEYS, kind_direction[kind].tolist()))
+        by_kind.append(entry)
+
+    # Dépendances par couple (type du supplier, type du client)
+    edge_kinds = np.bincount(kinds[trace_graph.suppliers] * kind_count + kinds[trace_graph.clients],
+                             minlength=kind_count * kind_count).reshape(kind_count, kind_count)
+
+    # Paquetages : la dernière ligne regroupe les éléments hors paquetage
+    package_count = len(trace_graph.package_ids)
+    slots = np.where(trace_graph.packages >= 0, trace_graph.packages, package_count).astype(np.int64)
+    direct = np.stack([np.bincount(slots, weights=values, minlength=package_count + 1)
+                       for values in (np.ones(node_count), covered, upstream, downstream)], axis=1).astype(np.int64)
+    parents = trace_graph.package_parents.astype(np.int64)
+    depths = _package_depths(parents)
+    cumulative = _rollup(direct[:package_count], parents, depths)
+
+    by_package = []
+    paths = package_paths(trace_graph)
+    for package, (direct_row, row) in enumerate(zip(direct[:package_count].tolist(), cumulative.tolist())):
+        entry = {'id': trace_graph.package_ids[package], 'name': trace_graph.package_names[package],
+                 'path': paths[package], 'depth': int(depths[package]),
+                 'parent': trace_graph.package_ids[parents[package]] if parents[package] >= 0 else None,
+                 'percentage': _percentage(row[1], row[0]),
+                 'direct_total': direct_row[0], 'direct_covered': direct_row[1]}
+        entry.update(zip(PACKAGE_COLUMNS, row))
+        by_package.append(entry)
+    unpackaged = dict(zip(PACKAGE_COLUMNS, direct[package_count].tolist()))
+
+    orphans = dict(trace_graph.orphans)
+    return {
+        'total': node_count,
+        'covered': covered_count,
+        'percentage': _percentage(covered_count, node_count),
+        'dependencies': trace_graph.edge_count,
+        'by_kind': by_kind,
+        'by_direction': dict(zip(DIRECTION_KEYS, direction_totals.tolist())),
+        'edges_by_kind': edge_kinds.tolist(),
+        'by_package': by_package,
+        'unpackaged': unpackaged,
+        'orphans': orphans,
+        'orphan_count': sum(orphans.values()),
+    }
+
+def print_metrics(metrics, package_limit=20):
+    print(f"Couverture : {metrics['covered']}/{metrics['total']} ({metrics['percentage']:.2f}%), "
+          f"{metrics['dependencies']} dépendances")
+    print("Par type :")
+    for entry in metrics['by_kind']:
+        print(f"  {entry['kind']:<20} {entry['covered']:>8}/{entry['total']:<8} {entry['percentage']:6.2f}%")
+    print("Par sens :")
+    for key, name in zip(DIRECTION_KEYS, DIRECTION_NAMES):
+        print(f"  {name:<20} {metrics['by_direction'][key]:>8}")
+    packages = sorted((entry for entry in metrics['by_package'] if entry['total']),
+                      key=lambda entry: (entry['percentage'], entry['path']))
+    if packages:
+        print("Paquetages les moins couverts :")
+        for entry in packages[:package_limit]:
+            print(f"  {entry['percentage']:6.2f}%  {entry['covered']:>8}/{entry['total']:<8} {entry['path']}")
+    orphans = metrics['orphans']
+    print(f"Dépendances orphelines : {metrics['orphan_count']} (supplier absent {orphans['missing_supplier']}, "
+          f"client absent {orphans['missing_client']}, les deux {orphans['missing_both']}, "
+          f"sans xmi:id {orphans['missing_id']})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Couverture détaillée par type, sens et paquetage")
+    parser.add_argument('file_paths', nargs='+', help="fichiers XMI d'un même projet")
+    parser.add_argument('-n', '--packages', type=int, default=20, help="nombre de paquetages affichés")
+    parser.add_argument('--json', help="fichier JSON des métriques complètes")
+    args = parser.parse_args()
+
+    try:
+        trace_graph = xmi_data_management.load_graph_cached(args.file_paths)
+    except xmi_data_management.XMILoadError as e:
+        raise SystemExit(f"Erreur lors du chargement du fichier XML : {e}")
+    metrics = compute_metrics(trace_graph)
+    print_metrics(metrics, args.packages)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(metrics, file, indent=2, ensure_ascii=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import argparse
+import bisect
+import re
+import unicodedata
+import numpy as np
+import xmi_data_management
+
+NAME_WEIGHT = 3.0  # Un terme du nom compte plus qu'un terme de la description
+PREFIX_FACTOR = 0.6  # Terme qui ne fait que commencer par le mot cherché
+FUZZY_FACTOR = 0.4  # Terme à une faute de frappe près
+MIN_PREFIX_LENGTH = 2  # Mots plus courts : correspondance exacte seulement
+FUZZY_MIN_LENGTH = 4  # Mots plus courts : pas de correspondance approchée
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+LIGATURES = {'œ': 'oe', 'æ': 'ae'}
+STOPWORDS = frozenset("""
+    au aux avec ce ces cet cette dans de des du elle en est et il ils la le les leur leurs lui
+    ma mais me mes mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sont sur
+    ta te tes ton tu un une vos votre vous
+""".split())
+
+class _AccentFolding(dict):
+    # Table pour str.translate : caractère -> équivalent sans accent (é -> e, œ -> oe),
+    # calculée au premier usage de chaque caractère
+    def __missing__(self, code):
+        decomposed = unicodedata.normalize('NFKD', chr(code))
+        folded = ''.join(char for char in decomposed if not unicodedata.combining(char))
+        folded = LIGATURES.get(folded, folded)
+        self[code] = folded
+        return folded
+
+_FOLDING = _AccentFolding()
+_FOLDED_TOKENS = {}  # Mot en minuscules -> terme indexé ('' pour un mot ignoré)
+FOLDED_TOKENS_MAX = 1 << 18
+
+def _fold_token(token):
+    folded = token if token.isascii() else token.translate(_FOLDING)
+    if (len(folded) < 2 and not folded.isdigit()) or folded in STOPWORDS:
+        folded = ''
+    if len(_FOLDED_TOKENS) >= FOLDED_TOKENS_MAX:
+        _FOLDED_TOKENS.clear()
+    _FOLDED_TOKENS[token] = folded
+    return folded
+
+def _words(text):
+    # Découpage avant la suppression des accents, qui est mise en cache par mot
+    if not unicodedata.is_normalized('NFC', text):
+        text = unicodedata.normalize('NFC', text)
+    return TOKEN_PATTERN.findall(text.casefold())
+
+def tokenize(text):
+    # Mots sans casse ni accents ; les élisions (l', d', qu') et les mots vides sont ignorés
+    tokens = []
+    for token in _words(text):
+        folded = _FOLDED_TOKENS.get(token)
+        if folded is None:
+            folded = _fold_token(token)
+        if folded:
+            tokens.append(folded)
+    return tokens
+
+def _deletions(term):
+    # Le terme et ses variantes à un caractère supprimé : deux mots à une faute de
+    # frappe près (substitution, insertion, suppression, inversion) en partagent une
+    return {term} | {term[:position] + term[position + 1:] for position in range(len(term))}
+
+class SearchIndex:
+    # Index inversé sur les noms et descriptions des éléments d'un graph.TraceGraph.
+    # Le vocabulaire est trié : les termes commençant par un préfixe sont contigus, et
+    # leurs listes d'éléments (concaténées au format CSR) forment une seule tranche.
+
+    def __init__(self, names, descriptions):
+        self.size = len(names)
+        # Occurrences (terme, nœud, poids) des noms puis des descriptions
+        term_index = {}  # terme -> indice provisoire
+        word_terms = {}  # mot tel que découpé -> indice de terme (-1 : mot ignoré)
+        occurrence_terms = []
+        lengths = []
+        for texts in (names, descriptions):
+            for text in texts:
+                count = len(occurrence_terms)
+                for word in _words(text) if text else ():
+                    term = word_terms.get(word)
+                    if term is None:
+                        folded = _fold_token(word)
+                        term = word_terms[word] = term_index.setdefault(folded, len(term_index)) if folded else -1
+                    if term >= 0:
+                        occurrence_terms.append(term)
+                lengths.append(len(occurrence_terms) - count)
+        lengths = np.asarray(lengths, dtype=np.int64)
+        occurrence_nodes = np.repeat(np.tile(np.arange(self.size, dtype=np.int64), 2), lengths)
+        occurrence_weights = np.repeat(np.repeat([NAME_WEIGHT, 1.0], self.size), lengths)
+
+        # Vocabulaire trié, puis regroupement des occurrences par couple (terme, nœud)
+        vocabulary = list(term_index)
+        order = sorted(range(len(vocabulary)), key=vocabulary.__getitem__)
+        self.terms = [vocabulary[term] for term in order]
+        rank = np.empty(len(vocabulary), dtype=np.int64)
+        rank[order] = np.arange(len(vocabulary))
+        keys = rank[np.asarray(occurrence_terms, dtype=np.int64)] * max(self.size, 1) + occurrence_nodes
+        keys, inverse = np.unique(keys, return_inverse=True)
+        weights = np.bincount(inverse, weights=occurrence_weights, minlength=len(keys))
+        posting_terms = keys // max(self.size, 1)
+        self.nodes = keys % max(self.size, 1)
+        counts = np.bincount(posting_terms, minlength=len(self.terms))
+        self.offsets = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+
+        # Pertinence : fréquence amortie pondérée par la rareté du terme (idf)
+        idf = np.log1p(self.size / np.maximum(counts, 1))
+        self.weights = np.log1p(weights) * idf[posting_terms]
+
+        self.variants = {}  # variante -> indices des termes
+        for term_index, term in enumerate(self.terms):
+            if len(term) >= FUZZY_MIN_LENGTH:
+                for variant in _deletions(term):
+                    self.variants.setdefault(variant, []).append(term_index)
+
+    def __len__(self):
+        return self.size
+
+    def _fuzzy_terms(self, token):
+        found = set()
+        for variant in _deletions(token):
+            found.update(self.variants.get(variant, ()))
+        return found
+
+    def _token_scores(self, token, fuzzy):
+        terms = self.terms
+        low = bisect.bisect_left(terms, token)
+        exact = low < len(terms) and terms[low] == token
+        if len(token) >= MIN_PREFIX_LENGTH:
+            high = bisect.bisect_left(terms, token + '\U0010ffff', low)
+        else:
+            high = low + exact
+        start, end = self.offsets[low], self.offsets[high]
+        nodes = [self.nodes[start:end]]
+        weights = self.weights[start:end].copy()
+        if exact:
+            weights[self.offsets[low + 1] - start:] *= PREFIX_FACTOR
+        else:
+            weights *= PREFIX_FACTOR
+        weights = [weights]
+
+        if fuzzy and len(token) >= FUZZY_MIN_LENGTH:
+            for term_index in self._fuzzy_terms(token):
+                if low <= term_index < high:
+                    continue
+                start, end = self.offsets[term_index], self.offsets[term_index + 1]
+                nodes.append(self.nodes[start:end])
+                weights.append(self.weights[start:end] * FUZZY_FACTOR)
+
+        return np.bincount(np.concatenate(nodes), weights=np.concatenate(weights), minlength=self.size)
+
+    def scores(self, query, fuzzy=True):
+        # Score de chaque élément (0 : ne correspond pas) ; tous les mots de la requête
+        # doivent correspondre. None si la requête ne contient aucun mot indexable.
+        total = None
+        for token in dict.fromkeys(tokenize(query)):
+            token_scores = self._token_scores(token, fuzzy)
+            if total is None:
+                total = token_scores
+            else:
+                total = np.where((total > 0) & (token_scores > 0), total + token_scores, 0.0)
+        return total
+
+    def search(self, query, limit=20, fuzzy=True):
+        # Éléments les plus pertinents : liste de (nœud, score) par score décroissant
+        scores = self.scores(query, fuzzy)
+        if scores is None:
+            return []
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return list(zip(candidates.tolist(), scores[candidates].tolist()))
+
+def build_index(trace_graph):
+    return SearchIndex(trace_graph.names, trace_graph.descriptions)
+
+def main():
+    parser = argparse.ArgumentParser(description="Recherche plein texte dans les noms et descriptions du modèle")
+    parser.add_argument('file_path', help="fichier XMI")
+    parser.add_argument('query', help="mots recherchés (préfixes et fautes de frappe tolérés)")
+    parser.add_argument('-n', '--limit', type=int, default=20, help="nombre de résultats")
+    parser.add_argument('--exact', action='store_true', help="sans correspondance approchée")
+    args = parser.parse_args()
+
+    try:
+        trace_graph = xmi_data_management.load_graph_cached(args.file_path)
+    except xmi_data_management.XMILoadError as e:
+        raise SystemExit(f"Erreur lors du chargement du fichier XML : {e}")
+    search_index = build_index(trace_graph)
+    for node, score in search_index.search(args.query, args.limit, fuzzy=not args.exact):
+        print(f"{score:6.2f}  {trace_graph.ids[node]}: {trace_graph.names[node]}")
+
+if __name__ == "__main__":
+    main()
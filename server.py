@@ -0,0 +1,319 @@
+import argparse
+import asyncio
+import bisect
+import json
+import os
+import time
+from urllib.parse import urlsplit, parse_qs, unquote
+import numpy as np
+import instrumentation
+import search
+import xmi_data_management
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+POLL_INTERVAL = 2.0  # Secondes entre deux vérifications des fichiers surveillés
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 10000
+MAX_HEADER_LINES = 100
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 500: 'Internal Server Error'}
+
+class QueryError(Exception):
+    # Erreur renvoyée au client avec le code HTTP correspondant
+    def __init__(self, status, message):
+        super().__init__(status, message)
+        self.status = status
+        self.message = message
+
+def _file_state(file_paths):
+    # Taille et date de modification des fichiers (None si l'un d'eux est illisible)
+    try:
+        return tuple((stat.st_size, stat.st_mtime_ns) for stat in map(os.stat, file_paths))
+    except OSError:
+        return None
+
+def _int_parameter(query, name, default, maximum=None):
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[0])
+    except ValueError:
+        raise QueryError(400, f"paramètre {name} invalide : {values[0]}")
+    if value < 0:
+        raise QueryError(400, f"paramètre {name} négatif : {value}")
+    return min(value, maximum) if maximum is not None else value
+
+class Model:
+    # Modèle chargé et ses index ; remplacé d'un bloc à chaque rechargement, les
+    # requêtes en cours gardent donc une vue cohérente
+    def __init__(self, name, file_paths, trace_graph, state):
+        self.name = name
+        self.file_paths = file_paths
+        self.graph = trace_graph
+        self.state = state
+        self.loaded_at = time.time()
+        self.uncovered_nodes = trace_graph.uncovered()
+        self.coverage_counts = trace_graph.coverage()
+
+        # Index de recherche : noms sans casse triés (préfixes par dichotomie) et concaténés
+        # (sous-chaînes par str.find, début de chaque nom dans name_starts)
+        folded_names = [(name or '').casefold().replace('\n', ' ') for name in trace_graph.names]
+        order = sorted(range(len(folded_names)), key=folded_names.__getitem__)
+        self.sorted_names = [folded_names[node] for node in order]
+        self.sorted_nodes = order
+        self.search_text = '\n'.join(folded_names)
+        self.name_starts = np.cumsum([0] + [len(name) + 1 for name in folded_names[:-1]]).tolist()
+        self.search_index = search.build_index(trace_graph)
+
+        # Axes de la matrice de couverture, dans l'ordre de l'export Excel
+        self.matrix_rows, self.matrix_columns = trace_graph.matrix_axes()
+        self.column_position = np.full(len(trace_graph), -1, dtype=np.int64)
+        self.column_position[self.matrix_columns] = np.arange(len(self.matrix_columns))
+
+    def element(self, node):
+        return {'id': self.graph.ids[node], 'name': self.graph.names[node], 'description': self.graph.descriptions[node]}
+
+    def node(self, xmi_id):
+        node = self.graph.index.get(xmi_id)
+        if node is None:
+            raise QueryError(404, f"élément inconnu : {xmi_id}")
+        return node
+
+    def summary(self):
+        covered_elements, total_elements, coverage_percentage = self.coverage_counts
+        return {'name': self.name, 'files': self.file_paths, 'loaded_at': self.loaded_at,
+                'elements': total_elements, 'dependencies': self.graph.edge_count,
+                'covered': covered_elements, 'coverage': coverage_percentage}
+
+    def coverage(self):
+        covered_elements, total_elements, coverage_percentage = self.coverage_counts
+        return {'covered': covered_elements, 'total': total_elements, 'percentage': coverage_percentage}
+
+    def uncovered(self, offset, limit):
+        uncovered = self.uncovered_nodes
+        return {'total': len(uncovered), 'offset': offset,
+                'elements': [self.element(node) for node in uncovered[offset:offset + limit].tolist()]}
+
+    def neighbours(self, xmi_id):
+        # Dépendances de l'élément dans les deux sens
+        node = self.node(xmi_id)
+        trace_graph = self.graph
+        clients = [{'dependency': trace_graph.edge_ids[edge], **self.element(trace_graph.clients[edge])}
+                   for edge in trace_graph.successor_edges(node).tolist()]
+        suppliers = [{'dependency': trace_graph.edge_ids[edge], **self.element(trace_graph.suppliers[edge])}
+                     for edge in trace_graph.predecessor_edges(node).tolist()]
+        return {'element': self.element(node), 'clients': clients, 'suppliers': suppliers}
+
+    def search(self, text, limit):
+        # Recherche sans casse dans les noms : noms commençant par le texte (les noms
+        # identiques en premier), puis noms le contenant, dans l'ordre du document.
+        # Le parcours s'arrête dès que limit résultats sont trouvés.
+        text = text.casefold().replace('\n', ' ')
+        if not text:
+            raise QueryError(400, "paramètre q manquant")
+        low = bisect.bisect_left(self.sorted_names, text)
+        high = bisect.bisect_left(self.sorted_names, text + '\U0010ffff', low)
+        matches = self.sorted_nodes[low:min(high, low + limit + 1)]
+
+        search_text = self.search_text
+        name_starts = self.name_starts
+        position = search_text.find(text)
+        while position >= 0 and len(matches) <= limit:
+            node = bisect.bisect_right(name_starts, position) - 1
+            if position != name_starts[node]:
+                matches.append(node)
+            if node + 1 == len(name_starts):
+                break
+            position = search_text.find(text, name_starts[node + 1])
+        return {'truncated': len(matches) > limit, 'elements': [self.element(node) for node in matches[:limit]]}
+
+    def fulltext(self, text, limit):
+        # Recherche plein texte classée (noms et descriptions, préfixes, fautes de frappe)
+        if not text.strip():
+            raise QueryError(400, "paramètre q manquant")
+        return {'elements': [{**self.element(node), 'score': score}
+                             for node, score in self.search_index.search(text, limit)]}
+
+    def matrix(self, row_offset, row_limit, column_offset, column_limit):
+        # Fenêtre de la matrice de couverture : cellules [ligne, colonne] relatives à la fenêtre
+        rows = self.matrix_rows[row_offset:row_offset + row_limit]
+        columns = self.matrix_columns[column_offset:column_offset + column_limit]
+        cells = []
+        for row, supplier in enumerate(rows):
+            positions = self.column_position[self.graph.successors(supplier)] - column_offset
+            positions = np.unique(positions[(positions >= 0) & (positions < len(columns))])
+            cells.extend([row, column] for column in positions.tolist())
+        return {'row_count': len(self.matrix_rows), 'column_count': len(self.matrix_columns),
+                'row_offset': row_offset, 'column_offset': column_offset,
+                'rows': [self.element(node) for node in rows],
+                'columns': [self.element(node) for node in columns],
+                'cells': cells}
+
+def load_model(name, file_paths, state=None):
+    with instrumentation.span('server.load', model=name):
+        return Model(name, file_paths, xmi_data_management.load_graph_cached(file_paths), state)
+
+class QueryServer:
+    # Serveur HTTP/JSON local : les modèles sont chargés une fois puis gardés en mémoire,
+    # et rechargés en arrière-plan quand leurs fichiers changent
+    def __init__(self, model_files, poll_interval=POLL_INTERVAL):
+        self.model_files = model_files
+        self.poll_interval = poll_interval
+        self.models = {}
+        self.watched_states = {}
+
+    async def load(self, name):
+        file_paths = self.model_files[name]
+        state = _file_state(file_paths)
+        self.watched_states[name] = state
+        start = time.perf_counter()
+        try:
+            # Analyse hors de la boucle : les requêtes continuent d'être servies avec l'ancien modèle
+            model = await asyncio.to_thread(load_model, name, file_paths, state)
+        except xmi_data_management.XMILoadError as e:
+            print(f"Erreur lors du chargement du modèle {name} : {e}")
+            return
+        self.models[name] = model
+        print(f"Modèle {name} chargé en {time.perf_counter() - start:.2f} s "
+              f"({len(model.graph)} éléments, {model.graph.edge_count} dépendances)")
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            for name, file_paths in self.model_files.items():
+                # Une erreur imprévue (mémoire, bogue, fichier remplacé pendant la lecture) ne
+                # doit pas arrêter la surveillance : l'ancien modèle reste servi
+                try:
+                    state = _file_state(file_paths)
+                    if state is not None and state != self.watched_states.get(name):
+                        print(f"Modification détectée, rechargement du modèle {name}")
+                        await self.load(name)
+                except Exception as e:
+                    print(f"Erreur lors du rechargement du modèle {name} : {e!r}")
+
+    def model(self, name):
+        model = self.models.get(name)
+        if model is None:
+            raise QueryError(404, f"modèle inconnu ou non chargé : {name}")
+        return model
+
+    def route(self, path, query):
+        parts = [unquote(part) for part in path.strip('/').split('/')]
+        if parts == ['models']:
+            return [model.summary() for model in self.models.values()]
+        if len(parts) < 2 or parts[0] != 'models':
+            raise QueryError(404, f"ressource inconnue : {path}")
+        model = self.model(parts[1])
+        resource = parts[2:]
+        if not resource:
+            return model.summary()
+        if resource == ['coverage']:
+            return model.coverage()
+        if resource == ['uncovered']:
+            return model.uncovered(_int_parameter(query, 'offset', 0),
+                                   _int_parameter(query, 'limit', DEFAULT_LIMIT, MAX_LIMIT))
+        if len(resource) == 2 and resource[0] == 'elements':
+            return model.neighbours(resource[1])
+        if resource == ['search']:
+            return model.search(query.get('q', [''])[0], _int_parameter(query, 'limit', DEFAULT_LIMIT, MAX_LIMIT))
+        if resource == ['fulltext']:
+            return model.fulltext(query.get('q', [''])[0], _int_parameter(query, 'limit', DEFAULT_LIMIT, MAX_LIMIT))
+        if resource == ['matrix']:
+            return model.matrix(_int_parameter(query, 'row_offset', 0),
+                                _int_parameter(query, 'row_limit', DEFAULT_LIMIT, MAX_LIMIT),
+                                _int_parameter(query, 'column_offset', 0),
+                                _int_parameter(query, 'column_limit', DEFAULT_LIMIT, MAX_LIMIT))
+        raise QueryError(404, f"ressource inconnue : {path}")
+
+    def respond(self, method, target):
+        if method not in ('GET', 'HEAD'):
+            return 405, {'error': f"méthode non supportée : {method}"}
+        url = urlsplit(target)
+        try:
+            return 200, self.route(url.path, parse_qs(url.query))
+        except QueryError as e:
+            return e.status, {'error': e.message}
+        except Exception as e:
+            return 500, {'error': str(e)}
+
+    async def handle_connection(self, reader, writer):
+        # HTTP/1.1 minimal avec connexions persistantes (keep-alive)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                for _ in range(MAX_HEADER_LINES):
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                if headers.get('content-length'):
+                    await reader.readexactly(int(headers['content-length']))
+
+                status, payload = self.respond(method, target)
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+                writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                             f"Content-Type: application/json; charset=utf-8\r\n"
+                             f"Content-Length: {len(body)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1'))
+                if method != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        for name in self.model_files:
+            await self.load(name)
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Serveur à l'écoute sur http://{host}:{port}/models")
+        watcher = asyncio.create_task(self.watch())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+def parse_model_arguments(arguments):
+    # "nom=fichier1,fichier2" ou simplement "fichier" (nom dérivé du fichier)
+    model_files = {}
+    for argument in arguments:
+        name, separator, paths = argument.partition('=')
+        if not separator:
+            name, paths = os.path.basename(argument).split('.')[0], argument
+        model_files[name] = paths.split(',')
+    return model_files
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur de requêtes HTTP/JSON sur des modèles XMI gardés en mémoire")
+    parser.add_argument('models', nargs='+', help="modèles : fichier.xmi ou nom=fichier1.xmi,fichier2.xmi")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="adresse d'écoute (locale par défaut)")
+    parser.add_argument('-p', '--port', type=int, default=DEFAULT_PORT, help="port d'écoute")
+    parser.add_argument('--poll', type=float, default=POLL_INTERVAL,
+                        help="intervalle de surveillance des fichiers en secondes")
+    args = parser.parse_args()
+    instrumentation.configure_from_environment()
+
+    server = QueryServer(parse_model_arguments(args.models), args.poll)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("Arrêt du serveur")
+
+if __name__ == "__main__":
+    main()
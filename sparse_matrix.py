@@ -0,0 +1,393 @@
+import argparse
+import bisect
+import struct
+import sys
+import zipfile
+import numpy as np
+import graph
+import xmi_data_management
+
+FORMAT_VERSION = 1
+EXTENSION = '.npz'
+ZIP_LOCAL_HEADER_SIZE = 30
+
+class StringArray:
+    # Suite de chaînes stockée comme Arrow : octets UTF-8 concaténés et offsets, ce qui
+    # permet de la projeter en mémoire ; chaque chaîne n'est décodée qu'à la demande.
+    # Les tranches (pas de 1) partagent les tableaux sans copie.
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, values):
+        encoded = [(value or '').encode('utf-8') for value in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            start, stop, step = position.indices(len(self))
+            if step != 1:
+                raise ValueError("Tranche avec un pas non pris en charge")
+            return StringArray(self.data, self.offsets[start:max(stop, start) + 1])
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError(position)
+        return self.data[self.offsets[position]:self.offsets[position + 1]].tobytes().decode('utf-8')
+
+    def __iter__(self):
+        # Un seul accès au tableau projeté, puis découpage des octets
+        start = int(self.offsets[0])
+        blob = self.data[start:self.offsets[-1]].tobytes()
+        offsets = (self.offsets - start).tolist()
+        return (blob[offsets[position]:offsets[position + 1]].decode('utf-8') for position in range(len(self)))
+
+    def tolist(self):
+        return list(self)
+
+def _position(ids, elem_id):
+    # Identifiants triés : recherche dichotomique, sans index en mémoire
+    position = bisect.bisect_left(ids, elem_id)
+    if position < len(ids) and ids[position] == elem_id:
+        return position
+    return None
+
+def _csr(rows, columns, row_count, column_count):
+    # Couples (ligne, colonne) dédoublonnés et triés -> indptr, indices
+    keys = graph.sorted_unique(np.asarray(rows, dtype=np.int64) * max(column_count, 1) + columns)
+    indptr = np.zeros(row_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // max(column_count, 1), minlength=row_count), out=indptr[1:])
+    return indptr, (keys % max(column_count, 1)).astype(np.int32)
+
+class CoverageMatrix:
+    # Matrice de couverture creuse supplier x client au format CSR : la ligne r (supplier
+    # row_ids[r]) a ses clients dans indices[indptr[r]:indptr[r + 1]], triés. Les lignes et
+    # colonnes sont triées par xmi:id, ce qui permet d'aligner deux matrices (révisions
+    # d'un modèle, modèles différents) sans table de correspondance.
+
+    def __init__(self, row_ids, row_names, column_ids, column_names, indptr, indices):
+        self.row_ids = row_ids
+        self.row_names = row_names
+        self.column_ids = column_ids
+        self.column_names = column_names
+        self.indptr = indptr
+        self.indices = indices
+        self._transposed = None
+
+    @property
+    def shape(self):
+        return len(self.row_ids), len(self.column_ids)
+
+    @property
+    def nnz(self):
+        return int(self.indptr[-1] - self.indptr[0])
+
+    def _row_numbers(self):
+        # Numéro de ligne de chaque valeur non nulle
+        return np.repeat(np.arange(len(self.row_ids), dtype=np.int64), np.diff(self.indptr))
+
+    def _column_index(self):
+        # Vue CSC (colonne -> lignes), calculée au premier accès par colonne
+        if self._transposed is None:
+            order = np.argsort(self.indices, kind='stable')
+            offsets = np.zeros(len(self.column_ids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.indices, minlength=len(self.column_ids)), out=offsets[1:])
+            self._transposed = offsets, self._row_numbers()[order]
+        return self._transposed
+
+    def clients(self, supplier_id):
+        row = _position(self.row_ids, supplier_id)
+        if row is None:
+            return []
+        start, end = self.indptr[row] - self.indptr[0], self.indptr[row + 1] - self.indptr[0]
+        return [self.column_ids[column] for column in self.indices[start:end].tolist()]
+
+    def suppliers(self, client_id):
+        column = _position(self.column_ids, client_id)
+        if column is None:
+            return []
+        offsets, rows = self._column_index()
+        return [self.row_ids[row] for row in rows[offsets[column]:offsets[column + 1]].tolist()]
+
+    def contains(self, supplier_id, client_id):
+        row = _position(self.row_ids, supplier_id)
+        column = _position(self.column_ids, client_id)
+        if row is None or column is None:
+            return False
+        start, end = self.indptr[row] - self.indptr[0], self.indptr[row + 1] - self.indptr[0]
+        found = start + np.searchsorted(self.indices[start:end], column)
+        return bool(found < end and self.indices[found] == column)
+
+    def pairs(self):
+        # Couples (supplier, client) ligne par ligne
+        for row, column in zip(self._row_numbers().tolist(), self.indices.tolist()):
+            yield self.row_ids[row], self.column_ids[column]
+
+    def row_slice(self, start, stop):
+        # Lignes start:stop, toutes les colonnes ; sans copie pour une matrice projetée
+        start, stop, _ = slice(start, stop).indices(len(self.row_ids))
+        stop = max(stop, start)
+        base = self.indptr[0]
+        return CoverageMatrix(self.row_ids[start:stop], self.row_names[start:stop], self.column_ids,
+                              self.column_names, self.indptr[start:stop + 1],
+                              self.indices[self.indptr[start] - base:self.indptr[stop] - base])
+
+    def column_slice(self, start, stop):
+        # Colonnes start:stop, toutes les lignes
+        start, stop, _ = slice(start, stop).indices(len(self.column_ids))
+        stop = max(stop, start)
+        keep = (self.indices >= start) & (self.indices < stop)
+        indptr = np.zeros(len(self.row_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self._row_numbers()[keep], minlength=len(self.row_ids)), out=indptr[1:])
+        return CoverageMatrix(self.row_ids, self.row_names, self.column_ids[start:stop],
+                              self.column_names[start:stop], indptr, (self.indices[keep] - start).astype(np.int32))
+
+def from_graph(trace_graph):
+    # Couples (supplier, client) distincts d'un graph.TraceGraph ; seuls les éléments qui
+    # ont au moins une dépendance sortante (lignes) ou entrante (colonnes) figurent
+    # (mêmes couples et mêmes axes que l'export Excel, mais triés par xmi:id)
+    node_count = max(len(trace_graph), 1)
+    supplier_nodes, client_nodes = trace_graph.matrix_pairs()
+    ids = trace_graph.ids
+    names = trace_graph.names
+    rows, columns = trace_graph.matrix_axes(by_name=False)
+    row_positions = np.zeros(node_count, dtype=np.int64)
+    row_positions[rows] = np.arange(len(rows))
+    column_positions = np.zeros(node_count, dtype=np.int64)
+    column_positions[columns] = np.arange(len(columns))
+    indptr, indices = _csr(row_positions[supplier_nodes], column_positions[client_nodes], len(rows), len(columns))
+    return CoverageMatrix(StringArray.from_strings(ids[node] for node in rows),
+                          StringArray.from_strings(names[node] for node in rows),
+                          StringArray.from_strings(ids[node] for node in columns),
+                          StringArray.from_strings(names[node] for node in columns),
+                          indptr, indices)
+
+def _offsets(values):
+    # Offsets sur 32 bits tant qu'ils tiennent, ce qui divise leur taille par deux
+    return values.astype(np.int32 if values[-1] < 2 ** 31 else np.int64)
+
+def save(matrix, file_path, compress=False):
+    # Archive .npz : sans compression (par défaut) chaque tableau peut être projeté en
+    # mémoire par load ; compress=True donne un fichier plus petit, chargé entièrement
+    arrays = {'format_version': np.array([FORMAT_VERSION], dtype=np.int64),
+              'indptr': _offsets(np.asarray(matrix.indptr, dtype=np.int64) - matrix.indptr[0]),
+              'indices': np.asarray(matrix.indices, dtype=np.int32)}
+    for key in ('row_ids', 'row_names', 'column_ids', 'column_names'):
+        strings = getattr(matrix, key)
+        if not isinstance(strings, StringArray):
+            strings = StringArray.from_strings(strings)
+        start = strings.offsets[0]
+        arrays[key + '_data'] = np.asarray(strings.data[start:strings.offsets[-1]], dtype=np.uint8)
+        arrays[key + '_offsets'] = _offsets(np.asarray(strings.offsets, dtype=np.int64) - start)
+    with open(file_path, 'wb') as file:
+        (np.savez_compressed if compress else np.savez)(file, **arrays)
+
+def _mapped_arrays(file_path):
+    # Tableaux non compressés de l'archive projetés directement depuis le fichier (np.memmap) ;
+    # les membres compressés sont lus normalement
+    arrays = {}
+    with open(file_path, 'rb') as file, zipfile.ZipFile(file) as archive:
+        for info in archive.infolist():
+            key = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[key] = np.lib.format.read_array(member)
+                continue
+            file.seek(info.header_offset)
+            name_length, extra_length = struct.unpack('<HH', file.read(ZIP_LOCAL_HEADER_SIZE)[26:30])
+            file.seek(info.header_offset + ZIP_LOCAL_HEADER_SIZE + name_length + extra_length)
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+            if int(np.prod(shape)) == 0:
+                arrays[key] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[key] = np.memmap(file_path, dtype=dtype, mode='r', offset=file.tell(), shape=shape,
+                                        order='F' if fortran_order else 'C')
+    return arrays
+
+def load(file_path, mmap=True):
+    # Ouverture quasi instantanée en mode projeté : seules les pages lues sont chargées
+    if mmap:
+        arrays = _mapped_arrays(file_path)
+    else:
+        with np.load(file_path) as archive:
+            arrays = {key: archive[key] for key in archive.files}
+    if 'format_version' not in arrays or int(arrays['format_version'][0]) != FORMAT_VERSION:
+        raise ValueError(f"{file_path} : format de matrice non pris en charge")
+    strings = {key: StringArray(arrays[key + '_data'], arrays[key + '_offsets'])
+               for key in ('row_ids', 'row_names', 'column_ids', 'column_names')}
+    return CoverageMatrix(strings['row_ids'], strings['row_names'], strings['column_ids'],
+                          strings['column_names'], arrays['indptr'], arrays['indices'])
+
+def _string_array(values):
+    return values if isinstance(values, StringArray) else StringArray.from_strings(values)
+
+def _fixed_width(strings):
+    # Chaînes -> tableau NumPy d'octets de largeur fixe ('S'), trié et comparé en C ; l'ordre
+    # des octets UTF-8 est celui des points de code, donc celui des str Python
+    offsets = np.asarray(strings.offsets, dtype=np.int64)
+    data = np.asarray(strings.data)
+    lengths = np.diff(offsets)
+    width = max(int(lengths.max(initial=0)), 1)
+    if not len(data):
+        return np.zeros(len(lengths), dtype=f'S{width}')
+    columns = np.arange(width)
+    padded = np.where(columns < lengths[:, None], data[np.minimum(offsets[:-1, None] + columns, len(data) - 1)], 0)
+    return np.ascontiguousarray(padded, dtype=np.uint8).view(f'S{width}').ravel()
+
+def _take(strings, positions):
+    # Sous-suite strings[positions] sans décodage
+    offsets = np.asarray(strings.offsets, dtype=np.int64)
+    starts = offsets[positions]
+    lengths = offsets[positions + 1] - starts
+    new_offsets = np.zeros(len(positions) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_offsets[1:])
+    index = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+    return StringArray(np.asarray(strings.data)[index], new_offsets)
+
+def _concatenate(first, second):
+    first_offsets = np.asarray(first.offsets, dtype=np.int64)
+    second_offsets = np.asarray(second.offsets, dtype=np.int64)
+    data = np.concatenate([np.asarray(first.data)[first_offsets[0]:first_offsets[-1]],
+                           np.asarray(second.data)[second_offsets[0]:second_offsets[-1]]])
+    offsets = np.concatenate([first_offsets - first_offsets[0],
+                              second_offsets[1:] - second_offsets[0] + first_offsets[-1] - first_offsets[0]])
+    return StringArray(data, offsets)
+
+def _merge_axis(first_ids, first_names, second_ids, second_names):
+    # Union triée des xmi:id d'un axe, position de chaque identifiant des deux matrices
+    # dans cette union, et fonction qui extrait (ids, noms) d'un sous-ensemble de l'union
+    # (nom pris dans la première matrice s'il y figure)
+    first_keys = _fixed_width(first_ids)
+    second_keys = _fixed_width(second_ids)
+    merged = graph.sorted_unique(np.concatenate([first_keys, second_keys]))
+
+    def select(used):
+        keys = merged[used]
+        first_positions = np.minimum(np.searchsorted(first_keys, keys), max(len(first_keys) - 1, 0))
+        in_first = (first_keys[first_positions] == keys) if len(first_keys) else np.zeros(len(keys), dtype=bool)
+        sources = np.where(in_first, first_positions, len(first_keys) + np.searchsorted(second_keys, keys))
+        return (_take(_concatenate(first_ids, second_ids), sources),
+                _take(_concatenate(first_names, second_names), sources))
+
+    return len(merged), np.searchsorted(merged, first_keys), np.searchsorted(merged, second_keys), select
+
+def _combine(first, second, operation):
+    # Alignement des deux matrices sur l'union triée de leurs xmi:id, opération sur les
+    # couples encodés en entiers (ligne * colonnes + colonne), puis suppression des
+    # lignes et colonnes vides. Tout est vectorisé : aucune chaîne n'est décodée.
+    first_strings = [_string_array(getattr(first, key)) for key in ('row_ids', 'row_names', 'column_ids', 'column_names')]
+    second_strings = [_string_array(getattr(second, key)) for key in ('row_ids', 'row_names', 'column_ids', 'column_names')]
+    row_count, first_rows, second_rows, select_rows = _merge_axis(first_strings[0], first_strings[1],
+                                                          second_strings[0], second_strings[1])
+    column_count, first_columns, second_columns, select_columns = _merge_axis(first_strings[2], first_strings[3],
+                                                                              second_strings[2], second_strings[3])
+    column_count = max(column_count, 1)
+
+    def keys(matrix, rows, columns):
+        return rows[matrix._row_numbers()].astype(np.int64) * column_count + columns[matrix.indices]
+
+    result = operation(keys(first, first_rows, first_columns), keys(second, second_rows, second_columns))
+    used_rows = graph.sorted_unique(result // column_count)
+    used_columns = graph.sorted_unique(result % column_count)
+    # Renumérotation des lignes et colonnes conservées par tables de correspondance
+    row_numbers = np.zeros(max(row_count, 1), dtype=np.int64)
+    row_numbers[used_rows] = np.arange(len(used_rows))
+    column_numbers = np.zeros(column_count, dtype=np.int64)
+    column_numbers[used_columns] = np.arange(len(used_columns))
+    indptr, indices = _csr(row_numbers[result // column_count], column_numbers[result % column_count],
+                           len(used_rows), len(used_columns))
+    row_ids, row_names = select_rows(used_rows)
+    column_ids, column_names = select_columns(used_columns)
+    return CoverageMatrix(row_ids, row_names, column_ids, column_names, indptr, indices)
+
+def union(first, second):
+    return _combine(first, second, lambda a, b: graph.sorted_unique(np.concatenate([a, b])))
+
+def intersection(first, second):
+    return _combine(first, second, lambda a, b: np.intersect1d(a, b, assume_unique=True))
+
+def difference(first, second):
+    # Couples présents dans first et absents de second
+    return _combine(first, second, lambda a, b: np.setdiff1d(a, b, assume_unique=True))
+
+def compare(old, new):
+    # Couples ajoutés et supprimés entre deux révisions
+    return difference(new, old), difference(old, new)
+
+def _describe(matrix, label):
+    rows, columns = matrix.shape
+    print(f"{label} : {rows} suppliers x {columns} clients, {matrix.nnz} couples")
+
+def _print_pairs(matrix, limit):
+    for count, (supplier_id, client_id) in enumerate(matrix.pairs()):
+        if count == limit:
+            print(f"  ... {matrix.nnz - limit} de plus")
+            break
+        print(f"  {supplier_id} -> {client_id}")
+
+def _run_command(args):
+    if args.command == 'export':
+        trace_graph = xmi_data_management.load_graph_cached(args.file_paths)
+        matrix = from_graph(trace_graph)
+        save(matrix, args.output, args.compress)
+        _describe(matrix, args.output)
+    elif args.command == 'info':
+        matrix = load(args.matrix)
+        _describe(matrix, args.matrix)
+        _print_pairs(matrix, args.limit)
+    elif args.command == 'diff':
+        added, removed = compare(load(args.old), load(args.new))
+        _describe(added, "Ajoutés")
+        _print_pairs(added, args.limit)
+        _describe(removed, "Supprimés")
+        _print_pairs(removed, args.limit)
+        if args.added:
+            save(added, args.added)
+        if args.removed:
+            save(removed, args.removed)
+    else:
+        matrix = load(args.matrices[0])
+        for file_path in args.matrices[1:]:
+            matrix = union(matrix, load(file_path))
+        save(matrix, args.output)
+        _describe(matrix, args.output)
+
+def main():
+    parser = argparse.ArgumentParser(description="Matrice de couverture creuse (.npz) : export, comparaison, union")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export_parser = commands.add_parser('export', help="exporter la matrice d'un modèle XMI")
+    export_parser.add_argument('file_paths', nargs='+', help="fichier(s) XMI d'un même projet")
+    export_parser.add_argument('-o', '--output', required=True, help="fichier .npz écrit")
+    export_parser.add_argument('--compress', action='store_true', help="compresser (fichier non projetable)")
+    info_parser = commands.add_parser('info', help="décrire une matrice")
+    info_parser.add_argument('matrix', help="fichier .npz")
+    info_parser.add_argument('-n', '--limit', type=int, default=0, help="couples affichés")
+    diff_parser = commands.add_parser('diff', help="couples ajoutés et supprimés entre deux révisions")
+    diff_parser.add_argument('old', help="matrice de l'ancienne révision")
+    diff_parser.add_argument('new', help="matrice de la nouvelle révision")
+    diff_parser.add_argument('-n', '--limit', type=int, default=20, help="couples affichés par sens")
+    diff_parser.add_argument('--added', help="fichier .npz des couples ajoutés")
+    diff_parser.add_argument('--removed', help="fichier .npz des couples supprimés")
+    union_parser = commands.add_parser('union', help="réunir les matrices de plusieurs modèles")
+    union_parser.add_argument('matrices', nargs='+', help="fichiers .npz")
+    union_parser.add_argument('-o', '--output', required=True, help="fichier .npz écrit")
+    args = parser.parse_args()
+
+    try:
+        _run_command(args)
+    except (OSError, ValueError, zipfile.BadZipFile, xmi_data_management.XMILoadError) as e:
+        sys.exit(f"Erreur : {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import random
+import pytest
+import graph
+import impact
+
+def _random_graph(rng, node_count, edge_count):
+    # Graphe aléatoire avec cycles, boucles sur un élément et dépendances en double
+    ids = [f"_e{node}" for node in range(node_count)]
+    all_elements = {elem_id: f"Élément {elem_id}" for elem_id in ids}
+    edges = [(f"_d{number}", rng.choice(ids), rng.choice(ids)) for number in range(edge_count)]
+    return graph.build_graph(all_elements, {}, edges)
+
+def _brute_force(trace_graph, upstream):
+    # Distances minimales (>= 1) par parcours en largeur sur les paires supplier/client
+    neighbours = {node: [] for node in range(len(trace_graph))}
+    for supplier, client in zip(trace_graph.suppliers.tolist(), trace_graph.clients.tolist()):
+        if upstream:
+            neighbours[client].append(supplier)
+        else:
+            neighbours[supplier].append(client)
+    distances = []
+    for node in range(len(trace_graph)):
+        depths = {}
+        frontier = [node]
+        depth = 0
+        while frontier:
+            depth += 1
+            frontier = [target for current in frontier for target in neighbours[current] if target not in depths]
+            for target in frontier:
+                depths.setdefault(target, depth)
+            frontier = list(dict.fromkeys(frontier))
+        distances.append(depths)
+    return distances
+
+@pytest.mark.parametrize('upstream', [False, True])
+def test_reachable_matches_brute_force(upstream, monkeypatch):
+    # Cache minuscule : les fermetures sont évincées et recalculées en cours de test
+    monkeypatch.setattr(impact, 'CLOSURE_CACHE_ITEMS', 16)
+    rng = random.Random(42)
+    for node_count, edge_count in [(1, 0), (1, 1), (5, 3), (20, 15), (20, 40), (60, 50), (60, 150)]:
+        for _ in range(5):
+            trace_graph = _random_graph(rng, node_count, edge_count)
+            analyzer = impact.ImpactAnalyzer(trace_graph, upstream=upstream)
+            expected = _brute_force(trace_graph, upstream)
+            for node in list(range(node_count)) * 2:
+                assert analyzer.reachable(node).tolist() == sorted(expected[node])
+                for max_depth in (1, 2, 3):
+                    assert analyzer.within(node, max_depth) == {
+                        target: depth for target, depth in expected[node].items() if depth <= max_depth}
+            cyclic = {node for node in range(node_count) if node in expected[node]}
+            assert {node for members in analyzer.cycles() for node in members.tolist()} == cyclic
+            assert analyzer.has_cycle() == bool(cyclic)
@@ -0,0 +1,63 @@
+import os
+import random
+import pytest
+import incremental
+import xmi_data_management
+
+FIXTURES = [os.path.join(os.path.dirname(__file__), name)
+            for name in ('test.xmi', 'test2.xmi', 'test3.xmi', 'test4.xmi', 'test5.xmi')]
+
+def _edit(rng, all_elements, descriptions, edges, round_number):
+    # Révision suivante : éléments ajoutés, supprimés ou renommés, descriptions modifiées,
+    # dépendances ajoutées, supprimées ou redirigées (y compris vers un élément inconnu)
+    all_elements = dict(all_elements)
+    descriptions = dict(descriptions)
+    edges = list(edges)
+    for number in range(rng.randint(0, 3)):
+        elem_id = f"_new{round_number}_{number}"
+        all_elements[elem_id] = f"Nouvel élément {elem_id}"
+        descriptions[elem_id] = ''
+    for elem_id in rng.sample(sorted(all_elements), min(len(all_elements), rng.randint(0, 2))):
+        del all_elements[elem_id]
+        descriptions.pop(elem_id, None)
+    for elem_id in rng.sample(sorted(all_elements), min(len(all_elements), rng.randint(0, 2))):
+        if rng.random() < 0.5:
+            all_elements[elem_id] += ' (renommé)'
+        else:
+            descriptions[elem_id] = descriptions.get(elem_id, '') + ' modifiée'
+    targets = sorted(all_elements) + ['_inconnu']
+    for _ in range(rng.randint(0, 2)):
+        if edges:
+            edges.pop(rng.randrange(len(edges)))
+    for position in range(len(edges)):
+        if rng.random() < 0.2:
+            xmi_id, supplier_id, client_id = edges[position]
+            edges[position] = (xmi_id, rng.choice(targets), client_id)
+    for number in range(rng.randint(0, 3)):
+        edges.append((f"_dep{round_number}_{number}", rng.choice(targets), rng.choice(targets)))
+    return all_elements, descriptions, edges
+
+def _state(snapshot):
+    incident = {elem_id: ids for elem_id, ids in snapshot['incident'].items() if ids}
+    return (snapshot['elements'], snapshot['descriptions'], snapshot['dependencies'], incident,
+            snapshot['degree'], snapshot['uncovered'])
+
+@pytest.mark.parametrize('file_path', FIXTURES)
+def test_apply_changes_matches_full_rebuild(file_path):
+    rng = random.Random(1234)
+    revision = xmi_data_management.scan_xmi(file_path)
+    snapshot = incremental.build_snapshot(*revision)
+    for round_number in range(200):
+        previous_uncovered = set(snapshot['uncovered'])
+        previous_elements = set(snapshot['elements'])
+        revision = _edit(rng, *revision, round_number)
+        changes = incremental.apply_changes(snapshot, *revision)
+        rebuilt = incremental.build_snapshot(*revision)
+        assert _state(snapshot) == _state(rebuilt)
+
+        # Le rapport de couverture suit la différence des éléments non couverts
+        kept = previous_elements & set(rebuilt['elements'])
+        reported = {change_type: {xmi_id for kind, xmi_id, _ in changes if kind == change_type}
+                    for change_type in (incremental.COVERAGE_LOST, incremental.COVERAGE_GAINED)}
+        assert reported[incremental.COVERAGE_LOST] == (rebuilt['uncovered'] - previous_uncovered) & kept
+        assert reported[incremental.COVERAGE_GAINED] == (previous_uncovered - rebuilt['uncovered']) & kept
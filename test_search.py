@@ -0,0 +1,18 @@
+import search
+
+def _matches(names, query):
+    search_index = search.SearchIndex(names, [''] * len(names))
+    return sorted(names[node] for node, _ in search_index.search(query))
+
+def test_every_word_must_match():
+    names = ['alpha', 'beta gamma', 'alpha beta']
+    assert _matches(names, "alpha beta") == ['alpha beta']
+    assert _matches(names, "beta alpha") == ['alpha beta']
+    assert _matches(names, "zzzz beta") == []
+    assert _matches(names, "beta zzzz") == []
+
+def test_accents_prefix_and_typo():
+    names = ['Sécurité du réseau', 'Exigence de performance', 'Réseau local']
+    assert _matches(names, "securite") == ['Sécurité du réseau']
+    assert _matches(names, "perf") == ['Exigence de performance']
+    assert _matches(names, "reseua") == ['Réseau local', 'Sécurité du réseau']
@@ -0,0 +1,80 @@
+import random
+import numpy as np
+import pytest
+import graph
+import sparse_matrix
+
+def _random_matrix(rng, ids, edge_count):
+    # Modèle aléatoire sur une partie des identifiants (noms accentués, doublons de dépendances)
+    chosen = rng.sample(ids, rng.randint(1, len(ids)))
+    all_elements = {elem_id: f"Élément {elem_id} é" for elem_id in chosen}
+    edges = [(f"_d{number}", rng.choice(chosen), rng.choice(chosen)) for number in range(edge_count)]
+    trace_graph = graph.build_graph(all_elements, {}, edges)
+    pairs = {(supplier_id, client_id) for _, supplier_id, client_id in edges}
+    return sparse_matrix.from_graph(trace_graph), pairs, all_elements
+
+def _names(matrix):
+    return (dict(zip(matrix.row_ids, matrix.row_names)), dict(zip(matrix.column_ids, matrix.column_names)))
+
+def _check(matrix, pairs, *element_maps):
+    # Couples attendus, axes triés par xmi:id et réduits aux lignes/colonnes non vides
+    assert set(matrix.pairs()) == pairs
+    assert matrix.nnz == len(pairs)
+    assert matrix.row_ids.tolist() == sorted({supplier_id for supplier_id, _ in pairs})
+    assert matrix.column_ids.tolist() == sorted({client_id for _, client_id in pairs})
+    row_names, column_names = _names(matrix)
+    for elem_id, name in {**row_names, **column_names}.items():
+        assert name == next(elements[elem_id] for elements in element_maps if elem_id in elements)
+
+def test_set_operations_match_python_sets():
+    rng = random.Random(7)
+    ids = [f"_é{number}" for number in range(40)]
+    for edge_count in (0, 1, 5, 30, 120):
+        for _ in range(10):
+            first, first_pairs, first_elements = _random_matrix(rng, ids, edge_count)
+            second, second_pairs, second_elements = _random_matrix(rng, ids, rng.randint(0, 60))
+            _check(first, first_pairs, first_elements)
+            _check(sparse_matrix.union(first, second), first_pairs | second_pairs, first_elements, second_elements)
+            _check(sparse_matrix.intersection(first, second), first_pairs & second_pairs, first_elements)
+            _check(sparse_matrix.difference(first, second), first_pairs - second_pairs, first_elements)
+            added, removed = sparse_matrix.compare(first, second)
+            _check(added, second_pairs - first_pairs, second_elements)
+            _check(removed, first_pairs - second_pairs, first_elements)
+
+def test_queries_and_slices():
+    rng = random.Random(11)
+    matrix, pairs, _ = _random_matrix(rng, [f"_e{number}" for number in range(30)], 80)
+    for supplier_id in matrix.row_ids:
+        assert matrix.clients(supplier_id) == sorted(client_id for source, client_id in pairs if source == supplier_id)
+    for client_id in matrix.column_ids:
+        assert matrix.suppliers(client_id) == sorted(source for source, target in pairs if target == client_id)
+    assert matrix.clients('_absent') == [] and matrix.suppliers('_absent') == []
+    for supplier_id in matrix.row_ids:
+        for client_id in matrix.column_ids:
+            assert matrix.contains(supplier_id, client_id) == ((supplier_id, client_id) in pairs)
+    rows = matrix.row_slice(2, 7)
+    assert set(rows.pairs()) == {pair for pair in pairs if pair[0] in set(matrix.row_ids.tolist()[2:7])}
+    columns = matrix.column_slice(3, 9)
+    assert set(columns.pairs()) == {pair for pair in pairs if pair[1] in set(matrix.column_ids.tolist()[3:9])}
+
+@pytest.mark.parametrize('compress, mmap', [(False, True), (False, False), (True, True), (True, False)])
+def test_save_load_round_trip(tmp_path, compress, mmap):
+    rng = random.Random(3)
+    matrix, pairs, elements = _random_matrix(rng, [f"_é{number}" for number in range(50)], 200)
+    file_path = tmp_path / 'matrice.npz'
+    sparse_matrix.save(matrix, file_path, compress)
+    loaded = sparse_matrix.load(file_path, mmap)
+    if mmap and not compress:
+        assert isinstance(loaded.indices, np.memmap)
+    _check(loaded, pairs, elements)
+    assert loaded.shape == matrix.shape
+    assert np.array_equal(loaded.indptr, matrix.indptr) and np.array_equal(loaded.indices, matrix.indices)
+    # Une tranche d'une matrice projetée se réenregistre à l'identique
+    sparse_matrix.save(loaded.row_slice(1, 4), tmp_path / 'tranche.npz')
+    assert set(sparse_matrix.load(tmp_path / 'tranche.npz').pairs()) == set(loaded.row_slice(1, 4).pairs())
+
+def test_empty_matrix_round_trip(tmp_path):
+    matrix = sparse_matrix.from_graph(graph.build_graph({'_a': 'A'}, {}, []))
+    sparse_matrix.save(matrix, tmp_path / 'vide.npz')
+    loaded = sparse_matrix.load(tmp_path / 'vide.npz')
+    assert loaded.shape == (0, 0) and loaded.nnz == 0 and list(loaded.pairs()) == []
@@ -1,9 +1,14 @@
+import functools
 import tkinter as tk
 from tkinter import ttk, filedialog
+import tkinter.font as tkfont
 from bs4 import BeautifulSoup
 import openpyxl
 from openpyxl import Workbook
-import textwrap
+import ui
+
+CHAR_WIDTH_CACHE_SIZE = 4096   # Largeurs mémorisées par (police, caractère)
+WRAP_CACHE_SIZE = 16384        # Textes découpés mémorisés par (texte, largeur, police)
 
 def load_xml(file_path):
     try:
@@ -100,17 +105,52 @@ def save_to_excel(dependencies):
     wb.save(file_path)
     print(f"Matrice sauvegardée dans le fichier {file_path}")
 
-# Fonction pour ajuster le texte à une largeur spécifique
+# Polices Tk créées une seule fois, puis réutilisées pour toutes les mesures
+_fonts = {}
+
+@functools.lru_cache(maxsize=CHAR_WIDTH_CACHE_SIZE)
+def _char_width(font, char):
+    tk_font = _fonts.get(font)
+    if tk_font is None:
+        tk_font = _fonts[font] = tkfont.Font(font=font)
+    return tk_font.measure(char)
+
+def _text_width(text, font):
+    return sum(_char_width(font, char) for char in text)
+
+# Fonction pour ajuster le texte à une largeur spécifique (en pixels)
+@functools.lru_cache(maxsize=WRAP_CACHE_SIZE)
 def adjust_text_to_width(text, width, font):
-    # Créer une instance d'un widget temporaire pour obtenir la largeur des caractères
-    temp_label = tk.Label(text=text, font=font)
-    # Largeur moyenne des caractères
-    char_width = temp_label.winfo_reqwidth() / len(text) if len(text) > 0 else 1
-    # Nombre de caractères par ligne
-    max_chars_per_line = int(width / char_width)
-    # Couper le texte en fonction de la largeur disponible
-    wrapped_text = "\n".join(textwrap.wrap(text, width=max_chars_per_line))
-    return wrapped_text
+    space_width = _char_width(font, ' ')
+    lines = []
+    line = []
+    line_width = 0
+    for word in text.split():
+        word_width = _text_width(word, font)
+        if line and line_width + space_width + word_width > width:
+            lines.append(' '.join(line))
+            line = []
+            line_width = 0
+        if not line and word_width > width:
+            # Mot plus long que la colonne : coupé caractère par caractère
+            chunk = ''
+            chunk_width = 0
+            for char in word:
+                char_width = _char_width(font, char)
+                if chunk and chunk_width + char_width > width:
+                    lines.append(chunk)
+                    chunk = ''
+                    chunk_width = 0
+                chunk += char
+                chunk_width += char_width
+            line = [chunk]
+            line_width = chunk_width
+            continue
+        line_width += word_width + (space_width if line else 0)
+        line.append(word)
+    if line:
+        lines.append(' '.join(line))
+    return "\n".join(lines)
 
 def create_gui(dependencies, all_elements, elements_without_dependencies):
     root = tk.Tk()
@@ -150,30 +190,22 @@ def create_gui(dependencies, all_elements, elements_without_dependencies):
 
     ttk.Label(left_frame, text="Matrice de Traçabilité", font=("Arial", 14)).grid(row=0, column=0, pady=10, sticky="ew")
 
-    # Ajouter une barre de défilement
-    tree_frame = ttk.Frame(left_frame)
-    tree_frame.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
-
-    tree_scrollbar = ttk.Scrollbar(tree_frame)
-    tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-    tree = ttk.Treeview(tree_frame, columns=("ID", "Supplier", "Client"), show='headings', yscrollcommand=tree_scrollbar.set)
-    tree.pack(expand=True, fill='both')
-
-    tree_scrollbar.config(command=tree.yview)
-
-    tree.heading("ID", text="xmi:id")
-    tree.heading("Supplier", text="Supplier")
-    tree.heading("Client", text="Client")
-
     # Taille maximale en pixels de la colonne Supplier et Client (à ajuster selon vos besoins)
     column_width = 200  # Exemple de largeur en pixels
     font = ("Arial", 10)  # Police utilisée dans le Treeview
 
-    for dep in dependencies:
-        supplier_name = adjust_text_to_width(dep[1], column_width, font)
-        client_name = adjust_text_to_width(dep[2], column_width, font)
-        tree.insert("", tk.END, values=(dep[0], supplier_name, client_name))
+    # Table virtualisée : le texte n'est découpé que pour les lignes visibles
+    def get_row(index):
+        dep = dependencies[index]
+        return (dep[0], adjust_text_to_width(dep[1], column_width, font), adjust_text_to_width(dep[2], column_width, font))
+
+    table = ui.VirtualTreeview(left_frame, [("ID", "xmi:id"), ("Supplier", "Supplier"), ("Client", "Client")],
+                               get_row, len(dependencies))
+    table.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
+    # Tri sur les valeurs brutes : seules les lignes visibles passent par adjust_text_to_width
+    table.set_sort_key("ID", lambda index: dependencies[index][0] or '')
+    table.set_sort_key("Supplier", lambda index: dependencies[index][1] or '')
+    table.set_sort_key("Client", lambda index: dependencies[index][2] or '')
 
     ttk.Label(left_frame, text="Cas d'utilisation ou exigences sans dépendances", font=("Arial", 12)).grid(row=2, column=0, pady=10, sticky="ew")
 
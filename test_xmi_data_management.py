@@ -0,0 +1,28 @@
+import os
+import pytest
+import bench
+import xmi_data_management
+
+pytest.importorskip('lxml')  # Analyseur 'xml' de BeautifulSoup, utilisé par parse_xml
+
+FIXTURES = [os.path.join(os.path.dirname(__file__), name)
+            for name in ('test.xmi', 'test2.xmi', 'test3.xmi', 'test4.xmi', 'test5.xmi')]
+
+def _assert_same_result(file_path):
+    # Même triplet que parse_xml (BeautifulSoup), y compris l'ordre des lignes et des éléments
+    expected = xmi_data_management.parse_xml(xmi_data_management.load_xml(file_path))
+    result = xmi_data_management.parse_xml_stream(file_path)
+    assert result[0] == expected[0]
+    assert list(result[1].items()) == list(expected[1].items())
+    assert result[2] == expected[2]
+
+@pytest.mark.parametrize('file_path', FIXTURES)
+def test_stream_parser_matches_bs4(file_path):
+    _assert_same_result(file_path)
+
+def test_stream_parser_matches_bs4_on_generated_model(tmp_path):
+    # Classificateurs imbriqués, plusieurs commentaires, références pendantes et paquetages
+    file_path = str(tmp_path / 'modele.xmi')
+    bench.generate_xmi(file_path, use_cases=60, nested_use_cases=30, requirements=80, dependencies=200,
+                       comments=2, commented_ratio=0.5, dangling=10, packages=4, seed=5)
+    _assert_same_result(file_path)
@@ -1,61 +1,235 @@
+import os
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk, filedialog
-from openpyxl import Workbook
-import pandas as pd
-
-def save_to_excel(dependencies):
+import numpy as np
+import export
+import instrumentation
+import metrics
+import search
+import sparse_matrix
+
+# Couleurs des graphiques de couverture
+COVERED_COLOR = "#3cb371"
+UNCOVERED_COLOR = "#f0f0f0"
+DIRECTION_COLORS = ("#d9d9d9", "#6495ed", "#f4a460", "#3cb371")  # Dans l'ordre de metrics.DIRECTION_KEYS
+
+def save_to_excel(trace_graph):
     file_path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")])
     
     if not file_path:
         return
 
-    wb = Workbook()
-    
-    # Première feuille : données de dépendance
-    ws1 = wb.active
-    ws1.title = "Données de Dépendance"
-    
-    # En-têtes
-    ws1.append(["xmi:id", "Supplier", "Client", "Supplier Description", "Client Description"])
-    
-    for dep in dependencies:
-        ws1.append(dep)
+    export.write_excel(trace_graph, file_path)
+    print(f"Matrice sauvegardée dans le fichier {file_path}")
 
-    # Préparation des données pour la matrice de couverture
-    suppliers = set()
-    clients = set()
-    
-    for _, supplier, client, _, _ in dependencies:
-        if supplier:
-            suppliers.add(supplier)
-        if client:
-            clients.add(client)
-    
-    suppliers = sorted(suppliers)
-    clients = sorted(clients)
-    
-    # Création de la matrice de couverture
-    matrix_data = pd.DataFrame(index=suppliers, columns=clients).fillna('')
+def save_to_npz(trace_graph):
+    # Matrice creuse pour les outils (sparse_matrix.load), bien plus compacte que le classeur
+    file_path = filedialog.asksaveasfilename(defaultextension=sparse_matrix.EXTENSION,
+                                             filetypes=[("Matrice creuse NumPy", "*" + sparse_matrix.EXTENSION)])
 
-    for _, supplier, client, _, _ in dependencies:
-        if supplier and client:
-            matrix_data.at[supplier, client] = 'X'  # 'X' indique un impact
-    
-    # Deuxième feuille : matrice de couverture
-    ws2 = wb.create_sheet(title="Matrice de Couverture")
+    if not file_path:
+        return
 
-    # Ajout des en-têtes de colonne
-    ws2.append([''] + clients)
-    
-    # Ajouter les lignes de la matrice
-    for supplier in suppliers:
-        row = [supplier] + [matrix_data.at[supplier, client] for client in clients]
-        ws2.append(row)
-    
-    wb.save(file_path)
+    with instrumentation.span('export.npz', dependencies=trace_graph.edge_count):
+        sparse_matrix.save(sparse_matrix.from_graph(trace_graph), file_path)
     print(f"Matrice sauvegardée dans le fichier {file_path}")
 
-def create_gui(dependencies, all_elements, elements_without_dependencies):
+class VirtualTreeview:
+    # Treeview virtualisé : seules les lignes visibles existent dans le widget et leurs
+    # valeurs sont relues via get_row(indice) à chaque défilement. Le tri et le filtrage
+    # ne manipulent que la liste des indices affichés, sans réinsérer les lignes.
+
+    def __init__(self, parent, columns, get_row=None, row_count=0):
+        self.frame = ttk.Frame(parent)
+        self.columns = [column for column, _ in columns]
+        self.get_row = get_row
+        self.rows = list(range(row_count))
+        self.offset = 0
+        self.visible = 0
+        self.sort_column = None
+        self.sort_reverse = False
+        self.sort_keys = {}
+
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree = ttk.Treeview(self.frame, columns=self.columns, show='headings', selectmode='browse')
+        self.tree.pack(expand=True, fill='both')
+        for column, heading in columns:
+            self.tree.heading(column, text=heading, command=lambda c=column: self.sort_by(c))
+
+        self.row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        self.tree.bind('<Configure>', self._on_configure)
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(3))
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def set_sort_key(self, column, key):
+        # Clé de tri (indice de ligne -> valeur) plus rapide que la relecture des lignes
+        self.sort_keys[column] = key
+
+    def set_source(self, get_row, rows):
+        # Nouveau modèle (ex. autre fichier chargé)
+        self.get_row = get_row
+        self.set_rows(rows)
+
+    def set_rows(self, rows):
+        # Nouvel ensemble de lignes affichées (ex. résultat d'un filtre)
+        self.rows = list(rows)
+        self._sort()
+        self.offset = 0
+        self.refresh()
+
+    def sort_by(self, column):
+        self.sort_reverse = self.sort_column == column and not self.sort_reverse
+        self.sort_column = column
+        self._sort()
+        self.offset = 0
+        self.refresh()
+
+    def _sort(self):
+        if self.sort_column is None:
+            return
+        key = self.sort_keys.get(self.sort_column)
+        if key is None:
+            position = self.columns.index(self.sort_column)
+            key = lambda row: str(self.get_row(row)[position] or '')
+        self.rows.sort(key=key, reverse=self.sort_reverse)
+
+    def scroll(self, step):
+        self.offset += step
+        self.refresh()
+        return "break"
+
+    def _on_mousewheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == 'moveto':
+            self.offset = int(float(value) * len(self.rows))
+        elif action == 'scroll':
+            self.offset += int(value) * (self.visible if unit == 'pages' else 1)
+        self.refresh()
+
+    def _on_configure(self, event):
+        # En-tête compris, on ne crée que le nombre de lignes qui tiennent dans le widget
+        visible = max(1, event.height // self.row_height - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.refresh()
+
+    def refresh(self):
+        total = len(self.rows)
+        self.offset = max(0, min(self.offset, total - self.visible))
+        selection = self.tree.selection()
+
+        self.tree.delete(*self.tree.get_children())
+        for row in self.rows[self.offset:self.offset + self.visible]:
+            self.tree.insert("", tk.END, iid=str(row), values=self.get_row(row))
+        for iid in selection:
+            if self.tree.exists(iid):
+                self.tree.selection_add(iid)
+
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+class LoadCancelled(Exception):
+    pass
+
+def _load_in_background(load_graph, file_paths, messages, cancel_event, generation):
+    # Exécuté dans un thread : les résultats ne passent que par la file messages,
+    # le thread Tk est le seul à toucher aux widgets
+    def check_cancelled():
+        if cancel_event.is_set():
+            raise LoadCancelled()
+
+    def progress(bytes_read, elements_found, dependencies_found):
+        check_cancelled()
+        messages.put((generation, 'progress', (bytes_read, elements_found, dependencies_found)))
+
+    try:
+        # L'annulation est aussi vérifiée entre les étapes : le calcul de la clé du cache
+        # et sa relecture, l'indexation et les métriques n'appellent pas progress
+        trace_graph = load_graph(file_paths, progress)
+        check_cancelled()
+        # Index de recherche construit dans le même thread, avant l'affichage
+        messages.put((generation, 'indexing', None))
+        with instrumentation.span('search.index', elements=len(trace_graph)):
+            search_index = search.build_index(trace_graph)
+        check_cancelled()
+        with instrumentation.span('metrics', elements=len(trace_graph), dependencies=trace_graph.edge_count):
+            coverage_metrics = metrics.compute_metrics(trace_graph)
+        check_cancelled()
+    except LoadCancelled:
+        messages.put((generation, 'cancelled', None))
+    except Exception as e:
+        messages.put((generation, 'error', str(e)))
+    else:
+        messages.put((generation, 'done', (trace_graph, search_index, coverage_metrics)))
+
+def draw_breakdown(canvas, coverage_metrics, width, height):
+    # Barres horizontales : couverture par type d'élément, répartition par sens de
+    # traçabilité (barre empilée), puis les paquetages les moins couverts tant qu'il reste de la place
+    canvas.delete("all")
+    if coverage_metrics is None:
+        return
+    margin = 10
+    bar_width = max(width - 2 * margin, 1)
+    position = [margin]
+
+    def text(value, x=margin, bold=False):
+        canvas.create_text(x, position[0], text=value, anchor="nw", font=("Arial", 9, "bold") if bold else ("Arial", 9))
+
+    def bar(label, covered, total):
+        percentage = covered / total * 100 if total > 0 else 0
+        text(f"{label} : {covered}/{total} ({percentage:.1f}%)")
+        top = position[0] + 15
+        canvas.create_rectangle(margin, top, margin + bar_width, top + 8, outline="", fill=UNCOVERED_COLOR)
+        if covered:
+            canvas.create_rectangle(margin, top, margin + bar_width * covered / total, top + 8,
+                                    outline="", fill=COVERED_COLOR)
+        position[0] = top + 14
+
+    text("Par type d'élément", bold=True)
+    position[0] += 18
+    for entry in coverage_metrics['by_kind']:
+        bar(entry['kind'], entry['covered'], entry['total'])
+
+    text("Par sens de traçabilité", bold=True)
+    position[0] += 18
+    left = margin
+    total = max(coverage_metrics['total'], 1)
+    for key, color in zip(metrics.DIRECTION_KEYS, DIRECTION_COLORS):
+        right = left + bar_width * coverage_metrics['by_direction'][key] / total
+        if right > left:
+            canvas.create_rectangle(left, position[0], right, position[0] + 8, outline="", fill=color)
+        left = right
+    position[0] += 14
+    for key, name, color in zip(metrics.DIRECTION_KEYS, metrics.DIRECTION_NAMES, DIRECTION_COLORS):
+        canvas.create_rectangle(margin, position[0] + 3, margin + 8, position[0] + 11, outline="", fill=color)
+        text(f"{name} : {coverage_metrics['by_direction'][key]}", x=margin + 14)
+        position[0] += 16
+
+    packages = [entry for entry in coverage_metrics['by_package'] if entry['total']]
+    room = (height - position[0] - 18) // 29
+    if len(packages) > 1 and room > 0:
+        position[0] += 6
+        text("Paquetages les moins couverts", bold=True)
+        position[0] += 18
+        packages.sort(key=lambda entry: (entry['percentage'], -entry['total'], entry['path']))
+        for entry in packages[:room]:
+            path = entry['path'] or ''
+            bar(path if len(path) <= 50 else '...' + path[-47:], entry['covered'], entry['total'])
+
+def create_gui(load_graph, file_paths=()):
+    # load_graph(file_paths, progress) -> graph.TraceGraph est exécuté hors du thread Tk
     root = tk.Tk()
     root.title("Matrice de Traçabilité")
 
@@ -63,6 +237,7 @@ def create_gui(dependencies, all_elements, elements_without_dependencies):
     root.geometry("800x600")  # Taille initiale, peut être ajustée
     root.minsize(600, 400)    # Taille minimale
     root.rowconfigure(0, weight=1)
+    root.rowconfigure(1, weight=0)  # Barre d'état
     root.columnconfigure(0, weight=1)
 
     main_frame = ttk.Frame(root)
@@ -79,37 +254,89 @@ def create_gui(dependencies, all_elements, elements_without_dependencies):
     right_frame.grid(row=0, column=1, sticky="nsew")
 
     left_frame.rowconfigure(0, weight=0)  # Label header
-    left_frame.rowconfigure(1, weight=1)  # Treeview
-    left_frame.rowconfigure(2, weight=0)  # Label
-    left_frame.rowconfigure(3, weight=1)  # Listbox
+    left_frame.rowconfigure(1, weight=0)  # Filtres
+    left_frame.rowconfigure(2, weight=1)  # Treeview
+    left_frame.rowconfigure(3, weight=0)  # Label
+    left_frame.rowconfigure(4, weight=1)  # Listbox
 
     left_frame.columnconfigure(0, weight=1)
 
     right_frame.rowconfigure(0, weight=1)  # Canvas
     right_frame.rowconfigure(1, weight=0)  # Label
-    right_frame.rowconfigure(2, weight=0)  # Button
+    right_frame.rowconfigure(2, weight=1)  # Répartition
+    right_frame.rowconfigure(3, weight=0)  # Dépendances orphelines
+    right_frame.rowconfigure(4, weight=0)  # Button
 
     right_frame.columnconfigure(0, weight=1)
 
     ttk.Label(left_frame, text="Matrice de Traçabilité", font=("Arial", 14)).grid(row=0, column=0, pady=10, sticky="ew")
 
-    tree = ttk.Treeview(left_frame, columns=("ID", "Supplier", "Client"), show='headings')
-    tree.heading("ID", text="xmi:id")
-    tree.heading("Supplier", text="Supplier")
-    tree.heading("Client", text="Client")
-    tree.grid(row=1, column=0, padx=10, pady=10, sticky="nsew")
-
-    for dep in dependencies:
-        tree.insert("", tk.END, values=dep[:3])
-
-    ttk.Label(left_frame, text="Cas d'utilisation ou exigences sans dépendances", font=("Arial", 12)).grid(row=2, column=0, pady=10, sticky="ew")
+    # Modèle affiché (remplacé à chaque chargement)
+    state = {'graph': None, 'index': None, 'lowered_names': [], 'coverage': (0, 0, 0), 'metrics': None}
+
+    # Filtres sur le texte du supplier et du client
+    filter_frame = ttk.Frame(left_frame)
+    filter_frame.grid(row=1, column=0, padx=10, sticky="ew")
+    filter_frame.columnconfigure(1, weight=1)
+    filter_frame.columnconfigure(3, weight=1)
+
+    supplier_filter = tk.StringVar()
+    client_filter = tk.StringVar()
+    ttk.Label(filter_frame, text="Supplier :").grid(row=0, column=0, padx=(0, 5))
+    ttk.Entry(filter_frame, textvariable=supplier_filter).grid(row=0, column=1, sticky="ew")
+    ttk.Label(filter_frame, text="Client :").grid(row=0, column=2, padx=5)
+    ttk.Entry(filter_frame, textvariable=client_filter).grid(row=0, column=3, sticky="ew")
+
+    # Recherche plein texte (noms et descriptions, préfixes, fautes de frappe tolérées)
+    search_filter = tk.StringVar()
+    ttk.Label(filter_frame, text="Recherche :").grid(row=1, column=0, padx=(0, 5), pady=(5, 0))
+    ttk.Entry(filter_frame, textvariable=search_filter).grid(row=1, column=1, columnspan=3, pady=(5, 0), sticky="ew")
+
+    # Table virtualisée : seules les lignes visibles sont créées dans le Treeview
+    table = VirtualTreeview(left_frame, [("ID", "xmi:id"), ("Supplier", "Supplier"), ("Client", "Client")])
+    table.grid(row=2, column=0, padx=10, pady=10, sticky="nsew")
+
+    def filtered_rows():
+        trace_graph = state['graph']
+        lowered_names = state['lowered_names']
+        mask = np.ones(trace_graph.edge_count, dtype=bool)
+        # Le texte est comparé une fois par élément, puis propagé aux dépendances
+        for variable, endpoints in ((supplier_filter, trace_graph.suppliers), (client_filter, trace_graph.clients)):
+            text = variable.get().strip().lower()
+            if text:
+                matching = np.fromiter((text in name for name in lowered_names), dtype=bool, count=len(lowered_names))
+                mask &= matching[endpoints]
+
+        scores = state['index'].scores(search_filter.get()) if state['index'] is not None else None
+        if scores is None:
+            return np.flatnonzero(mask).tolist()
+        # Une dépendance correspond si l'une de ses extrémités correspond ; sans tri par
+        # colonne, les plus pertinentes sont affichées en premier
+        edge_scores = np.maximum(scores[trace_graph.suppliers], scores[trace_graph.clients])
+        rows = np.flatnonzero(mask & (edge_scores > 0))
+        return rows[np.argsort(-edge_scores[rows], kind='stable')].tolist()
+
+    pending_filter = []
+
+    def apply_filter():
+        pending_filter.clear()
+        if state['graph'] is not None:
+            table.set_rows(filtered_rows())
+
+    def schedule_filter(*_):
+        # Filtrage différé pendant la frappe
+        if pending_filter:
+            root.after_cancel(pending_filter.pop())
+        pending_filter.append(root.after(200, apply_filter))
+
+    supplier_filter.trace_add('write', schedule_filter)
+    client_filter.trace_add('write', schedule_filter)
+    search_filter.trace_add('write', schedule_filter)
+
+    ttk.Label(left_frame, text="Cas d'utilisation ou exigences sans dépendances", font=("Arial", 12)).grid(row=3, column=0, pady=10, sticky="ew")
 
     listbox = tk.Listbox(left_frame)
-    listbox.grid(row=3, column=0, padx=10, pady=10, sticky="nsew")
-
-    for element_id in elements_without_dependencies:
-        name = all_elements.get(element_id, 'Inconnu')
-        listbox.insert(tk.END, f"{element_id}: {name}")
+    listbox.grid(row=4, column=0, padx=10, pady=10, sticky="nsew")
 
     # Canvas pour le cercle
     canvas = tk.Canvas(right_frame, bg="white")
@@ -118,22 +345,20 @@ def create_gui(dependencies, all_elements, elements_without_dependencies):
     right_frame.rowconfigure(0, weight=1)
     right_frame.columnconfigure(0, weight=1)
 
-    total_elements = len(all_elements)
-    covered_elements = total_elements - len(elements_without_dependencies)
-    coverage_percentage = (covered_elements / total_elements) * 100 if total_elements > 0 else 0
-
     # Fonction pour redessiner un cercle plus esthétique
-    def draw_circle(event):
+    def draw_circle(event=None):
         canvas.delete("all")  # Supprimer le contenu précédent
 
-        width = event.width
-        height = event.height
+        width = event.width if event is not None else canvas.winfo_width()
+        height = event.height if event is not None else canvas.winfo_height()
         diameter = min(width, height) - 40  # Garde un peu plus de marge
         radius = diameter // 2
 
         center_x = width // 2
         center_y = height // 2
 
+        covered_elements, total_elements, _ = state['coverage']
+
         # Ombre du cercle pour l'effet 3D
         canvas.create_oval(center_x - radius + 5, center_y - radius + 5,
                            center_x + radius + 5, center_y + radius + 5,
@@ -160,9 +385,159 @@ def create_gui(dependencies, all_elements, elements_without_dependencies):
     # Lier le redimensionnement du Canvas à la fonction draw_circle
     canvas.bind("<Configure>", draw_circle)
 
-    ttk.Label(right_frame, text=f"Taux de couverture: {coverage_percentage:.2f}%", font=("Arial", 12)).grid(row=1, column=0, pady=10, sticky="ew")
-
-    save_button = ttk.Button(right_frame, text="Exporter en Excel", command=lambda: save_to_excel(dependencies))
-    save_button.grid(row=2, column=0, pady=20, sticky="ew")
+    coverage_text = tk.StringVar(value="Taux de couverture: -")
+    ttk.Label(right_frame, textvariable=coverage_text, font=("Arial", 12)).grid(row=1, column=0, pady=10, sticky="ew")
+
+    # Répartition de la couverture par type, par sens et par paquetage
+    breakdown_canvas = tk.Canvas(right_frame, bg="white", highlightthickness=0)
+    breakdown_canvas.grid(row=2, column=0, sticky="nsew")
+
+    def draw_breakdown_canvas(event=None):
+        width = event.width if event is not None else breakdown_canvas.winfo_width()
+        height = event.height if event is not None else breakdown_canvas.winfo_height()
+        draw_breakdown(breakdown_canvas, state['metrics'], width, height)
+
+    breakdown_canvas.bind("<Configure>", draw_breakdown_canvas)
+
+    orphan_text = tk.StringVar(value="")
+    orphan_label = ttk.Label(right_frame, textvariable=orphan_text, font=("Arial", 10))
+    orphan_label.grid(row=3, column=0, pady=(10, 0), sticky="ew")
+    orphan_label.bind("<Configure>", lambda event: orphan_label.config(wraplength=event.width))
+
+    save_button = ttk.Button(right_frame, text="Exporter en Excel", command=lambda: save_to_excel(state['graph']))
+    save_button.grid(row=4, column=0, pady=20, sticky="ew")
+    save_button.state(['disabled'])
+
+    # Barre d'état : progression du chargement et annulation
+    status_frame = ttk.Frame(root, padding="5")
+    status_frame.grid(row=1, column=0, sticky="ew")
+    status_frame.columnconfigure(1, weight=1)
+
+    status_text = tk.StringVar(value="Aucun modèle chargé")
+    progress_bar = ttk.Progressbar(status_frame, length=200, mode='determinate')
+    progress_bar.grid(row=0, column=0, padx=(0, 10))
+    ttk.Label(status_frame, textvariable=status_text).grid(row=0, column=1, sticky="ew")
+
+    loading = {'generation': 0, 'cancel': None, 'total_bytes': 0}
+    messages = queue.Queue()
+
+    def cancel_loading():
+        if loading['cancel'] is not None:
+            loading['cancel'].set()
+
+    cancel_button = ttk.Button(status_frame, text="Annuler", command=cancel_loading)
+    cancel_button.grid(row=0, column=2, padx=(10, 0))
+    cancel_button.state(['disabled'])
+
+    def show_graph(trace_graph, search_index, coverage_metrics):
+        with instrumentation.span('ui.show_graph', elements=len(trace_graph), dependencies=trace_graph.edge_count):
+            populate(trace_graph, search_index, coverage_metrics)
+
+    def populate(trace_graph, search_index, coverage_metrics):
+        names = trace_graph.names
+        edge_ids = trace_graph.edge_ids
+        suppliers = trace_graph.suppliers.tolist()
+        clients = trace_graph.clients.tolist()
+        lowered_names = [(name or '').lower() for name in names]
+
+        state['graph'] = trace_graph
+        state['index'] = search_index
+        state['lowered_names'] = lowered_names
+        state['coverage'] = trace_graph.coverage()
+        state['metrics'] = coverage_metrics
+
+        table.set_sort_key("ID", lambda edge: edge_ids[edge])
+        table.set_sort_key("Supplier", lambda edge: lowered_names[suppliers[edge]])
+        table.set_sort_key("Client", lambda edge: lowered_names[clients[edge]])
+        table.set_source(lambda edge: (edge_ids[edge], names[suppliers[edge]], names[clients[edge]]), filtered_rows())
+
+        # Insertion en un seul appel Tcl
+        listbox.delete(0, tk.END)
+        uncovered_items = [f"{trace_graph.ids[node]}: {names[node]}" for node in trace_graph.uncovered().tolist()]
+        if uncovered_items:
+            listbox.insert(tk.END, *uncovered_items)
+
+        coverage_text.set(f"Taux de couverture: {state['coverage'][2]:.2f}%")
+        draw_circle()
+        draw_breakdown_canvas()
+        orphans = coverage_metrics['orphans']
+        orphan_text.set(f"Dépendances orphelines : {coverage_metrics['orphan_count']} "
+                        f"(supplier absent : {orphans['missing_supplier']}, client absent : {orphans['missing_client']}, "
+                        f"les deux : {orphans['missing_both']}, sans xmi:id : {orphans['missing_id']})")
+        save_button.state(['!disabled'])
+
+    def finish_loading(message):
+        loading['cancel'] = None
+        cancel_button.state(['disabled'])
+        status_text.set(message)
+
+    def start_loading(paths):
+        # Un nouveau chargement annule le précédent ; ses messages éventuels sont ignorés
+        cancel_loading()
+        loading['generation'] += 1
+        loading['cancel'] = threading.Event()
+        try:
+            loading['total_bytes'] = sum(os.path.getsize(file_path) for file_path in paths)
+        except OSError:
+            loading['total_bytes'] = 0
+        progress_bar.config(maximum=max(loading['total_bytes'], 1), value=0)
+        status_text.set(f"Chargement de {', '.join(os.path.basename(file_path) for file_path in paths)}...")
+        cancel_button.state(['!disabled'])
+        root.title(f"Matrice de Traçabilité - {', '.join(os.path.basename(file_path) for file_path in paths)}")
+        threading.Thread(target=_load_in_background,
+                         args=(load_graph, list(paths), messages, loading['cancel'], loading['generation']),
+                         daemon=True).start()
+
+    def poll_messages():
+        # Relève des messages du thread de chargement depuis la boucle Tk
+        try:
+            while True:
+                generation, kind, payload = messages.get_nowait()
+                if generation != loading['generation']:
+                    continue
+                if kind == 'progress':
+                    bytes_read, elements_found, dependencies_found = payload
+                    progress_bar.config(value=bytes_read)
+                    status_text.set(f"{bytes_read / 1e6:.1f} / {loading['total_bytes'] / 1e6:.1f} Mo lus, "
+                                    f"{elements_found} éléments, {dependencies_found} dépendances")
+                elif kind == 'indexing':
+                    progress_bar.config(value=progress_bar['maximum'])
+                    status_text.set("Indexation pour la recherche...")
+                elif kind == 'done':
+                    trace_graph, search_index, coverage_metrics = payload
+                    show_graph(trace_graph, search_index, coverage_metrics)
+                    finish_loading(f"{len(trace_graph)} éléments, {trace_graph.edge_count} dépendances")
+                elif kind == 'error':
+                    finish_loading(f"Erreur lors du chargement du fichier XML : {payload}")
+                elif kind == 'cancelled':
+                    progress_bar.config(value=0)
+                    finish_loading("Chargement annulé")
+        except queue.Empty:
+            pass
+        root.after(100, poll_messages)
+
+    def open_files():
+        paths = filedialog.askopenfilenames(filetypes=[("Fichiers XMI", "*.xmi *.xmi.gz *.zip"), ("Tous les fichiers", "*.*")])
+        if paths:
+            start_loading(paths)
+
+    def close():
+        cancel_loading()
+        root.destroy()
+
+    menubar = tk.Menu(root)
+    file_menu = tk.Menu(menubar, tearoff=0)
+    file_menu.add_command(label="Ouvrir...", command=open_files)
+    file_menu.add_command(label="Exporter la matrice creuse...",
+                          command=lambda: state['graph'] is not None and save_to_npz(state['graph']))
+    file_menu.add_separator()
+    file_menu.add_command(label="Quitter", command=close)
+    menubar.add_cascade(label="Fichier", menu=file_menu)
+    root.config(menu=menubar)
+    root.protocol("WM_DELETE_WINDOW", close)
+
+    poll_messages()
+    if file_paths:
+        start_loading(file_paths)
 
     root.mainloop()
\ No newline at end of file
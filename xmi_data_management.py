@@ -1,63 +1,194 @@
 
+import codecs
+import contextlib
+import gzip
+import io
+import os
+import re
+import sys
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+from xml.parsers.expat import ErrorString
 from bs4 import BeautifulSoup
-import ui #IHM pour la visualisation
+import cache
+import graph
+import instrumentation
+
+XMI_NAMESPACE = 'http://schema.omg.org/spec/XMI/2.1'
+ELEMENT_TAGS = ('packagedElement', 'nestedClassifier')
+RETAINED_TAGS = ('ownedComment', 'body', 'supplier', 'client', 'classifier')
+PROGRESS_INTERVAL = 5000  # Nombre d'éléments XML lus entre deux rapports de progression
+PARSER_VERSION = 3  # À incrémenter à chaque changement de la logique d'extraction (invalide le cache)
+READ_CHUNK_SIZE = 16 * 1024  # Taille des blocs transmis au parseur
+HEAD_SIZE = 1024  # Octets examinés pour reconnaître la compression et l'encodage
+GZIP_MAGIC = b'\x1f\x8b'
+ZIP_MAGIC = b'PK\x03\x04'
+# Encodages lus directement par expat ; les autres sont transcodés à la volée
+NATIVE_ENCODINGS = ('utf-8', 'utf-16', 'utf-16-le', 'utf-16-be', 'iso8859-1', 'ascii')
+XML_DECLARATION_ENCODING = re.compile(rb'^\s*<\?xml[^>]*?encoding\s*=\s*["\']([A-Za-z][A-Za-z0-9._-]*)["\']')
+
+class XMILoadError(Exception):
+    # Erreur de chargement d'un fichier XMI. kind vaut 'lecture', 'archive', 'encodage'
+    # ou 'syntaxe' ; line et column ne sont connus que pour les erreurs de syntaxe.
+    def __init__(self, file_path, kind, message, line=None, column=None):
+        super().__init__(file_path, kind, message, line, column)
+        self.file_path = file_path
+        self.kind = kind
+        self.message = message
+        self.line = line
+        self.column = column
+
+    def __str__(self):
+        position = f" (ligne {self.line}, colonne {self.column})" if self.line is not None else ''
+        return f"{self.file_path} : {self.message}{position}"
+
+LOAD_ERRORS = (ET.ParseError, zipfile.BadZipFile, zlib.error, EOFError, OSError, UnicodeError)
+
+def _load_error(error, file_path):
+    # Conversion des exceptions de lecture, de décompression et d'analyse en XMILoadError
+    if isinstance(error, ET.ParseError):
+        line, column = error.position
+        return XMILoadError(file_path, 'syntaxe', ErrorString(error.code), line, column)
+    if isinstance(error, (zipfile.BadZipFile, zlib.error, EOFError, gzip.BadGzipFile)):
+        return XMILoadError(file_path, 'archive', f"archive invalide ou tronquée ({error})")
+    if isinstance(error, UnicodeError):
+        return XMILoadError(file_path, 'encodage', str(error))
+    return XMILoadError(file_path, 'lecture', error.strerror or str(error))
+
+def detect_encoding(head):
+    # Encodage d'un document XML d'après sa marque d'ordre des octets ou sa déclaration
+    if head.startswith(codecs.BOM_UTF8):
+        return 'utf-8'
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    if head.startswith(b'<\x00?\x00'):
+        return 'utf-16-le'
+    if head.startswith(b'\x00<\x00?'):
+        return 'utf-16-be'
+    match = XML_DECLARATION_ENCODING.match(head)
+    if match is None:
+        return 'utf-8'
+    return _lookup_codec(match.group(1).decode('ascii')).name
+
+def _lookup_codec(encoding):
+    # Seul endroit où un LookupError signifie un encodage inconnu : il est converti en
+    # UnicodeError, rapporté comme erreur d'encodage du fichier (XMILoadError 'encodage')
+    try:
+        return codecs.lookup(encoding)
+    except LookupError:
+        raise UnicodeError(f"encodage inconnu ({encoding})") from None
+
+def _xmi_member(archive, file_path):
+    # Premier fichier .xmi de l'archive (ou son unique fichier)
+    names = [info.filename for info in archive.infolist() if not info.is_dir()]
+    xmi_names = sorted(name for name in names if name.lower().endswith('.xmi'))
+    if xmi_names:
+        return xmi_names[0]
+    if len(names) == 1:
+        return names[0]
+    raise XMILoadError(file_path, 'archive', "aucun fichier .xmi dans l'archive")
+
+@contextlib.contextmanager
+def open_xmi(file_path):
+    # Flux binaire du document, décompressé à la volée pour les exports gzip ou zip
+    # (sans fichier temporaire). Renvoie (flux, fichier brut) : la position dans le
+    # fichier brut sert à la progression, comparée à la taille sur disque.
+    with open(file_path, 'rb') as raw:
+        magic = raw.peek(len(ZIP_MAGIC))[:len(ZIP_MAGIC)]
+        if magic.startswith(GZIP_MAGIC):
+            with gzip.GzipFile(fileobj=raw) as stream:
+                yield stream, raw
+        elif magic == ZIP_MAGIC:
+            with zipfile.ZipFile(raw) as archive:
+                with archive.open(_xmi_member(archive, file_path)) as stream:
+                    yield stream, raw
+        else:
+            yield raw, raw
+
+def read_xmi_text(file_path):
+    # Document complet sous forme de texte, décodé selon sa déclaration XML
+    try:
+        with instrumentation.span('load_xml', file=os.fspath(file_path)) as step, open_xmi(file_path) as (stream, raw):
+            encoding = detect_encoding(stream.peek(HEAD_SIZE)[:HEAD_SIZE])
+            content = io.TextIOWrapper(stream, encoding='utf-8-sig' if encoding == 'utf-8' else encoding).read()
+            step.set(characters=len(content))
+            return content
+    except LOAD_ERRORS as e:
+        raise _load_error(e, file_path) from e
 
 def load_xml(file_path):
+    # Pour parse_xml ; scan_xmi lit le fichier par blocs et doit être préféré pour les gros modèles
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            xml_content = file.read()
-    except Exception as e:
+        return read_xmi_text(file_path)
+    except XMILoadError as e:
         print(f"Erreur lors du chargement du fichier XML : {e}")
         return None
-    return xml_content
 
 def parse_xml(xml_content):
-    soup = BeautifulSoup(xml_content, 'xml')
+    with instrumentation.span('parse_xml.soup', characters=len(xml_content)):
+        soup = BeautifulSoup(xml_content, 'xml')
+
+    # Parcours unique de l'arbre : toutes les recherches suivantes travaillent sur
+    # cette liste et sur l'index xmi:id -> élément, sans reparcourir le document
+    with instrumentation.span('parse_xml.find_all') as step:
+        candidate_elements = soup.find_all(ELEMENT_TAGS)
+        step.set(elements=len(candidate_elements))
+    packaged_elements = [elem for elem in candidate_elements if elem.name == 'packagedElement']
+    elements_by_id = {}
+    for elem in candidate_elements:
+        elements_by_id.setdefault(elem.get('xmi:id'), elem)
 
     # Récupération des noms des cas d'utilisation (UseCase)
     use_case_names = {elem.get('xmi:id'): elem.get('name') 
-                      for elem in soup.find_all(['packagedElement', 'nestedClassifier'], {'xmi:type': 'uml:UseCase'})}
+                      for elem in candidate_elements if elem.get('xmi:type') == 'uml:UseCase'}
 
     # Récupérer les exigences (xmi:type="uml:Class", name="Exigence")
-    exigence_elements = soup.find_all('packagedElement', {'xmi:type': 'uml:Class', 'name': 'Exigence'})
+    exigence_elements = [elem for elem in packaged_elements
+                         if elem.get('xmi:type') == 'uml:Class' and elem.get('name') == 'Exigence']
     
     # Extraire les identifiants des exigences trouvées
-    exigence_ids = [elem.get('xmi:id') for elem in exigence_elements]
+    exigence_ids = {elem.get('xmi:id') for elem in exigence_elements}
+    exigence_ids.discard(None)
 
     # Récupération des exigences associées
-    requirement_elements = {elem.get('xmi:id'): elem.get('name') for elem in soup.find_all('packagedElement', {'classifier': exigence_ids})}
+    requirement_elements = {elem.get('xmi:id'): elem.get('name') for elem in packaged_elements
+                            if elem.get('classifier') in exigence_ids}
     
     # Fusionner les dicts des cas d'utilisation et des exigences
     all_elements = {**use_case_names, **requirement_elements}
 
     # Récupération des descriptions à partir de ownedComment -> body pour les cas d'utilisation et exigences
     descriptions = {}
-    for elem_id, name in all_elements.items():
-        elem = soup.find('packagedElement', {'xmi:id': elem_id})
-        if elem:
-            owned_comment = elem.find('ownedComment')
-            if owned_comment:
-                body = owned_comment.find('body')
-                if body:
-                    descriptions[elem_id] = body.text  # Enregistre la description
+    with instrumentation.span('parse_xml.descriptions', elements=len(all_elements)):
+        for elem_id, name in all_elements.items():
+            elem = elements_by_id.get(elem_id)  # Accès direct par l'index
+            if elem is not None:
+                owned_comment = elem.find('ownedComment')
+                if owned_comment:
+                    body = owned_comment.find('body')
+                    if body:
+                        descriptions[elem_id] = body.text  # Enregistre la description
+                    else:
+                        descriptions[elem_id] = ''  # Pas de description trouvée
                 else:
-                    descriptions[elem_id] = ''  # Pas de description trouvée
-            else:
-                descriptions[elem_id] = ''  # Pas de commentaire trouvé
+                    descriptions[elem_id] = ''  # Pas de commentaire trouvé
 
     # Rechercher les dépendances
-    dependency_elements = soup.find_all('packagedElement', {'xmi:type': 'uml:Dependency'})
+    dependency_elements = [elem for elem in packaged_elements if elem.get('xmi:type') == 'uml:Dependency']
+    edges = [(dep_elem.get('xmi:id'), dep_elem.get('supplier'), dep_elem.get('client'))
+             for dep_elem in dependency_elements]
+
+    with instrumentation.span('resolve_dependencies', elements=len(all_elements), edges=len(edges)):
+        return resolve_dependencies(all_elements, descriptions, edges)
 
+def resolve_dependencies(all_elements, descriptions, edges):
     dependencies = []
     elements_with_dependencies = set()
     all_element_ids = set(all_elements.keys())
     
     # Traitement des dépendances
-    for dep_elem in dependency_elements:
-        xmi_id = dep_elem.get('xmi:id')
-        supplier_id = dep_elem.get('supplier')
-        client_id = dep_elem.get('client')
-        
+    for xmi_id, supplier_id, client_id in edges:
         supplier_valid = supplier_id in all_elements
         client_valid = client_id in all_elements
         
@@ -79,14 +210,244 @@ def parse_xml(xml_content):
 
     return dependencies, all_elements, elements_without_dependencies
 
+def _local_name(tag):
+    return tag.rpartition('}')[2]
+
+def _element_description(elem):
+    # Premier ownedComment -> body directement rattaché à l'élément
+    owned_comment = elem.find('ownedComment')
+    if owned_comment is None:
+        return ''
+    body = owned_comment.find('body')
+    return ''.join(body.itertext()) if body is not None else ''
+
+def _reference(elem, name):
+    # Référence vers un autre élément : attribut (name="id") ou, pour les liens entre
+    # fichiers, élément enfant <name href="autre.xmi#id"/>. Seul l'identifiant est conservé.
+    value = elem.get(name)
+    if value is None:
+        child = elem.find(name)
+        if child is None:
+            return None
+        value = child.get('href')
+        if value is None:
+            return None
+    return value.rpartition('#')[2]
+
+def _iter_events(stream):
+    # Équivalent de ET.iterparse alimenté par blocs de READ_CHUNK_SIZE ; le flux peut
+    # être binaire (encodage lu par expat) ou texte (déjà décodé)
+    parser = ET.XMLPullParser(events=('start-ns', 'start', 'end'))
+    read = stream.read
+    while True:
+        data = read(READ_CHUNK_SIZE)
+        if not data:
+            break
+        parser.feed(data)
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+def _scan_parts(source, progress=None):
+    # Parcours unique du fichier (chemin ou objet fichier binaire) par événements :
+    # chaque élément est détaché de son parent dès sa fermeture, la mémoire
+    # reste donc bornée par la profondeur du modèle et non par sa taille.
+    # progress(octets lus, éléments trouvés, dépendances trouvées) est appelé
+    # périodiquement ; il peut lever une exception pour interrompre l'analyse.
+    # Les erreurs de lecture et d'analyse sont levées sous forme de XMILoadError.
+    file_path = source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '<flux>')
+    try:
+        with instrumentation.span('scan', file=os.fspath(file_path)) as step:
+            if isinstance(source, (str, os.PathLike)):
+                with open_xmi(source) as (stream, raw):
+                    parts = _scan_stream(stream, raw.tell if progress is not None else None, progress)
+            else:
+                parts = _scan_stream(source, getattr(source, 'tell', None) if progress is not None else None, progress)
+            step.set(elements=len(parts[0]) + len(parts[2]), dependencies=len(parts[4]))
+            return parts
+    except LOAD_ERRORS as e:
+        raise _load_error(e, file_path) from e
+
+def _scan_stream(stream, tell, progress):
+    head = stream.peek(HEAD_SIZE)[:HEAD_SIZE] if hasattr(stream, 'peek') else b''
+    encoding = detect_encoding(head)
+    if encoding not in NATIVE_ENCODINGS:
+        # Encodage inconnu d'expat : le parseur reçoit le texte décodé
+        stream = _lookup_codec(encoding).streamreader(stream)
+
+    xmi_id = f'{{{XMI_NAMESPACE}}}id'
+    xmi_type = f'{{{XMI_NAMESPACE}}}type'
+
+    use_case_names = {}
+    exigence_ids = set()
+    classified_elements = {}  # xmi:id -> (nom, classifier)
+    candidate_descriptions = {}
+    edges = []
+    owners = {}  # xmi:id -> xmi:id du paquetage englobant le plus proche
+    packages = {}  # xmi:id du paquetage (ou du modèle) -> (nom, paquetage parent)
+    stack = []
+    countdown = PROGRESS_INTERVAL
+
+    for event, item in _iter_events(stream):
+        if event == 'start-ns':
+            prefix, uri = item
+            if prefix == 'xmi':
+                xmi_id = f'{{{uri}}}id'
+                xmi_type = f'{{{uri}}}type'
+            continue
+        if event == 'start':
+            stack.append(item)
+            continue
+
+        stack.pop()
+        tag = _local_name(item.tag)
+
+        if tell is not None:
+            countdown -= 1
+            if not countdown:
+                countdown = PROGRESS_INTERVAL
+                progress(tell(), len(use_case_names) + len(classified_elements), len(edges))
+
+        if tag in ELEMENT_TAGS:
+            elem_id = item.get(xmi_id)
+            elem_type = item.get(xmi_type)
+            name = item.get('name')
+
+            # Cas d'utilisation (UseCase)
+            if elem_type == 'uml:UseCase':
+                use_case_names[elem_id] = name
+                candidate_descriptions[elem_id] = _element_description(item)
+                owners[elem_id] = _owner_package(stack, xmi_id, xmi_type)
+
+            if tag == 'packagedElement':
+                # Classe Exigence et instances classifiées (résolues en fin de parcours)
+                if elem_type == 'uml:Class' and name == 'Exigence':
+                    exigence_ids.add(elem_id)
+                classifier = _reference(item, 'classifier')
+                if classifier is not None:
+                    classified_elements[elem_id] = (name, classifier)
+                    candidate_descriptions[elem_id] = _element_description(item)
+                    owners[elem_id] = _owner_package(stack, xmi_id, xmi_type)
+                # Dépendances
+                if elem_type == 'uml:Dependency':
+                    edges.append((elem_id, _reference(item, 'supplier'), _reference(item, 'client')))
+                elif elem_type == 'uml:Package':
+                    packages[elem_id] = (name, _owner_package(stack, xmi_id, xmi_type))
+        elif tag == 'Model':
+            packages[item.get(xmi_id)] = (item.get('name'), _owner_package(stack, xmi_id, xmi_type))
+
+        # Les commentaires et références restent attachés jusqu'à la fermeture de leur propriétaire
+        if tag in RETAINED_TAGS:
+            continue
+        if stack:
+            stack[-1].remove(item)
+        else:
+            item.clear()
+
+    return use_case_names, exigence_ids, classified_elements, candidate_descriptions, edges, owners, packages
+
+def _owner_package(stack, xmi_id, xmi_type):
+    # Paquetage (ou modèle) le plus proche parmi les ancêtres encore ouverts
+    for ancestor in reversed(stack):
+        if ancestor.get(xmi_type) == 'uml:Package' or _local_name(ancestor.tag) == 'Model':
+            return ancestor.get(xmi_id)
+    return None
+
+def _resolve_elements(use_case_names, exigence_ids, classified_elements, candidate_descriptions, edges):
+    requirement_elements = {elem_id: name for elem_id, (name, classifier) in classified_elements.items()
+                            if classifier in exigence_ids}
+    all_elements = {**use_case_names, **requirement_elements}
+    descriptions = {elem_id: candidate_descriptions.get(elem_id, '') for elem_id in all_elements}
+
+    return all_elements, descriptions, edges
+
+def scan_xmi(source):
+    return _resolve_elements(*_scan_parts(source)[:5])
+
+def _scan_files(sources, progress=None):
+    # Plusieurs fichiers d'un même projet : les exigences, cas d'utilisation et dépendances
+    # sont fusionnés dans un index xmi:id global avant résolution, ce qui conserve
+    # les liens qui traversent les fichiers. Coût linéaire en nombre total d'éléments.
+    use_case_names = {}
+    exigence_ids = set()
+    classified_elements = {}
+    candidate_descriptions = {}
+    edges = []
+    owners = {}
+    packages = {}
+    bytes_done = 0
+    for source in sources:
+        file_progress = None
+        if progress is not None:
+            # Progression cumulée sur l'ensemble des fichiers
+            done = (bytes_done, len(use_case_names) + len(classified_elements), len(edges))
+            file_progress = lambda read, elements, dependencies, done=done: progress(
+                done[0] + read, done[1] + elements, done[2] + dependencies)
+            if isinstance(source, (str, os.PathLike)):
+                bytes_done += os.path.getsize(source)
+        parts = _scan_parts(source, file_progress)
+        use_case_names.update(parts[0])
+        exigence_ids.update(parts[1])
+        classified_elements.update(parts[2])
+        candidate_descriptions.update(parts[3])
+        edges.extend(parts[4])
+        owners.update(parts[5])
+        packages.update(parts[6])
+
+    return use_case_names, exigence_ids, classified_elements, candidate_descriptions, edges, owners, packages
+
+def scan_model(sources, progress=None):
+    # Comme scan_xmi sur plusieurs fichiers, avec en plus le type de chaque élément
+    # (graph.KIND_*), son paquetage et la hiérarchie des paquetages
+    parts = _scan_files(sources, progress)
+    exigence_ids, classified_elements, owners, packages = parts[1], parts[2], parts[5], parts[6]
+    all_elements, descriptions, edges = _resolve_elements(*parts[:5])
+    kinds = {elem_id: graph.KIND_REQUIREMENT if classified_elements.get(elem_id, (None, None))[1] in exigence_ids
+             else graph.KIND_USE_CASE for elem_id in all_elements}
+    return all_elements, descriptions, edges, kinds, owners, packages
+
+def parse_xml_stream(file_path):
+    try:
+        all_elements, descriptions, edges = scan_xmi(file_path)
+    except XMILoadError as e:
+        print(f"Erreur lors du chargement du fichier XML : {e}")
+        return None
+    return resolve_dependencies(all_elements, descriptions, edges)
+
+def _source_list(sources):
+    # Un chemin seul ou une liste de fichiers d'un même projet
+    return [sources] if isinstance(sources, (str, os.PathLike)) else list(sources)
+
+def load_graph(sources, progress=None):
+    # Graphe de traçabilité compact (graph.TraceGraph) d'un ou plusieurs fichiers ;
+    # les erreurs de lecture sont propagées à l'appelant (XMILoadError)
+    sources = _source_list(sources)
+    all_elements, descriptions, edges, kinds, owners, packages = scan_model(sources, progress)
+    with instrumentation.span('build_graph', elements=len(all_elements), edges=len(edges)):
+        trace_graph = graph.build_graph(all_elements, descriptions, edges, kinds, owners, packages)
+    if progress is not None:
+        progress(sum(os.path.getsize(source) for source in sources if isinstance(source, (str, os.PathLike))),
+                 len(trace_graph), trace_graph.edge_count)
+    return trace_graph
+
+def load_graph_cached(sources, progress=None, cache_dir=None, max_bytes=cache.DEFAULT_MAX_BYTES):
+    # Comme load_graph ; le cache disque n'est utilisé que pour un fichier seul
+    sources = _source_list(sources)
+    if len(sources) != 1 or not isinstance(sources[0], (str, os.PathLike)):
+        return load_graph(sources, progress)
+    return cache.cached(sources[0], lambda file_path: load_graph([file_path], progress),
+                        PARSER_VERSION, cache_dir, max_bytes, name='parse_graph')
 
 
 def main():
-    file_path = 'Modele.xmi'
-    xml_content = load_xml(file_path)
-    if xml_content:
-        dependencies, all_elements, elements_without_dependencies = parse_xml(xml_content)
-        ui.create_gui(dependencies, all_elements, elements_without_dependencies)
+    # Un seul fichier par défaut ; plusieurs fichiers d'un projet découpé peuvent être passés en arguments
+    file_paths = sys.argv[1:] or ['Modele.xmi']
+    # Mesures et profil activés par les variables XMI_TRACE, XMI_TRACE_MEMORY et XMI_PROFILE
+    instrumentation.configure_from_environment()
+    # La fenêtre s'ouvre immédiatement, le chargement se fait en arrière-plan ; l'IHM (tkinter)
+    # n'est importée qu'ici pour que cli.py, server.py et batch.py fonctionnent sans Tk
+    import ui #IHM pour la visualisation
+    ui.create_gui(load_graph_cached, file_paths)
 
 if __name__ == "__main__":
     main()